@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the RAG components
+
+Measures document encoding throughput on the real corpus under
+DOCUMENTS_PATH, query latency of the vector store backends and the recall
+of quantized embedding storage, so that these settings can be tuned per
+host.
+"""
+
+import sys
+import time
+import json
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import numpy as np  # noqa: E402
+from sentence_transformers import SentenceTransformer  # noqa: E402
+
+from config.settings import settings  # noqa: E402
+from src.rag.documents import MarkdownDocumentProcessor  # noqa: E402
+from src.rag.encoder import DocumentEncoder  # noqa: E402
+from src.rag.vector_store import ChromaVectorStore, NumpyVectorStore  # noqa: E402
+
+
+def load_corpus_texts(limit: int = 0) -> List[str]:
+    """Load and split the document corpus into chunk texts."""
+    processor = MarkdownDocumentProcessor()
+    texts = [
+        chunk.page_content
+        for _, chunks in processor.iter_processed()
+        for chunk in chunks
+    ]
+    if limit:
+        texts = texts[:limit]
+    return texts
+
+
+def time_encoding(encoder: DocumentEncoder, texts: List[str], repeats: int) -> float:
+    """Return the best chunks/sec over the given number of runs."""
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encoder.encode(texts)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(texts) / elapsed if elapsed > 0 else 0.0)
+    return best
+
+
+def benchmark_encoding(
+    texts: List[str], batch_sizes: List[int], processes: int, repeats: int
+) -> List[Dict[str, Any]]:
+    """Benchmark every combination of batch size, sorting and process count."""
+    model = SentenceTransformer(settings.embedding_model)
+    # Warm up so that lazy initialisation is not measured
+    model.encode(texts[:8])
+
+    results = []
+    process_counts = [1] if processes == 1 else [1, processes]
+    for process_count in process_counts:
+        for batch_size in batch_sizes:
+            for sort_by_length in (False, True):
+                encoder = DocumentEncoder(
+                    model,
+                    batch_size=batch_size,
+                    sort_by_length=sort_by_length,
+                    processes=process_count,
+                )
+                try:
+                    rate = time_encoding(encoder, texts, repeats)
+                finally:
+                    encoder.close()
+
+                results.append(
+                    {
+                        "processes": encoder.processes,
+                        "batch_size": batch_size,
+                        "sort_by_length": sort_by_length,
+                        "chunks_per_sec": rate,
+                    }
+                )
+                print(
+                    f"  processes={encoder.processes:<3} batch_size={batch_size:<4} "
+                    f"sorted={str(sort_by_length):<5} {rate:8.1f} chunks/sec"
+                )
+
+    return results
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+    }
+
+
+def benchmark_vector_stores(
+    sizes: List[int], dim: int, queries: int, k: int, dtype: str
+) -> List[Dict[str, Any]]:
+    """Compare query latency of the Chroma and NumPy backends."""
+    rng = np.random.default_rng(0)
+    query_vectors = rng.standard_normal((queries, dim)).astype(np.float32)
+
+    results = []
+    for size in sizes:
+        vectors = rng.standard_normal((size, dim)).astype(np.float32)
+        ids = [f"chunk_{i}" for i in range(size)]
+        documents = [f"document {i}" for i in range(size)]
+        metadatas = [{"filename": f"doc_{i % 100}.md"} for i in range(size)]
+
+        backends = {
+            "chroma": lambda path: ChromaVectorStore(path, "benchmark"),
+            f"numpy-{dtype}": lambda path: NumpyVectorStore(path, dtype=dtype),
+        }
+        for name, create_store in backends.items():
+            with tempfile.TemporaryDirectory() as path:
+                store = create_store(path)
+                # Chroma limits the number of rows per call
+                for start in range(0, size, 5000):
+                    end = start + 5000
+                    store.upsert(
+                        ids[start:end],
+                        vectors[start:end],
+                        documents[start:end],
+                        metadatas[start:end],
+                    )
+
+                start = time.perf_counter()
+                store = create_store(path)
+                open_time = time.perf_counter() - start
+
+                store.query(query_vectors[0], k)
+                samples = []
+                for query in query_vectors:
+                    start = time.perf_counter()
+                    store.query(query, k)
+                    samples.append(time.perf_counter() - start)
+
+            stats = latency_stats(samples)
+            results.append(
+                {"backend": name, "size": size, "open_ms": open_time * 1000, **stats}
+            )
+            print(
+                f"  {name:<14} size={size:<7} open={open_time * 1000:8.1f}ms "
+                f"mean={stats['mean_ms']:7.3f}ms p50={stats['p50_ms']:7.3f}ms "
+                f"p95={stats['p95_ms']:7.3f}ms"
+            )
+
+    return results
+
+
+def load_queries(queries_file: str, texts: List[str], count: int) -> List[str]:
+    """Read queries from a file, one per line, or derive them from chunks."""
+    if queries_file:
+        with open(queries_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    # Without real queries, use the first sentence of evenly spaced chunks
+    step = max(1, len(texts) // count)
+    return [texts[i].split(".")[0][:200] for i in range(0, len(texts), step)][:count]
+
+
+def benchmark_recall(
+    texts: List[str], queries: List[str], k: int, dtypes: List[str]
+) -> List[Dict[str, Any]]:
+    """Compare top-k results of quantized storage against float32."""
+    model = SentenceTransformer(settings.embedding_model)
+    embeddings = model.encode(texts, batch_size=settings.encode_batch_size)
+    query_embeddings = model.encode(queries)
+    ids = [f"chunk_{i}" for i in range(len(texts))]
+    metadatas = [{} for _ in texts]
+
+    top_k = {}
+    results = []
+    for dtype in ["float32"] + [d for d in dtypes if d != "float32"]:
+        with tempfile.TemporaryDirectory() as path:
+            store = NumpyVectorStore(path, dtype=dtype)
+            store.upsert(ids, embeddings, texts, metadatas)
+            top_k[dtype] = [
+                {result["content"] for result in store.query(query, k)}
+                for query in query_embeddings
+            ]
+            memory = store.memory_bytes()
+
+        recall = sum(
+            len(found & expected) / len(expected)
+            for found, expected in zip(top_k[dtype], top_k["float32"])
+            if expected
+        ) / len(queries)
+        results.append({"dtype": dtype, f"recall@{k}": recall, "bytes": memory})
+        print(f"  {dtype:<8} recall@{k}={recall:.4f} index={memory / 1024:10.1f} KiB")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG component benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    encoding_parser = subparsers.add_parser(
+        "encoding", help="Document encoding throughput on the corpus"
+    )
+    encoding_parser.add_argument(
+        "--batch-sizes",
+        default="16,32,64,128",
+        help="Comma separated encode batch sizes (default: 16,32,64,128)",
+    )
+    encoding_parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Encoder processes for the multi-process runs (0 = one per CPU)",
+    )
+    encoding_parser.add_argument(
+        "--limit", type=int, default=0, help="Only use the first N chunks"
+    )
+    encoding_parser.add_argument(
+        "--repeats", type=int, default=1, help="Runs per configuration"
+    )
+
+    store_parser = subparsers.add_parser(
+        "vector-store", help="Query latency of the vector store backends"
+    )
+    store_parser.add_argument(
+        "--sizes",
+        default="1000,5000,20000",
+        help="Comma separated corpus sizes (default: 1000,5000,20000)",
+    )
+    store_parser.add_argument(
+        "--dim", type=int, default=384, help="Embedding dimension (default: 384)"
+    )
+    store_parser.add_argument(
+        "--queries", type=int, default=200, help="Queries per measurement"
+    )
+    store_parser.add_argument(
+        "--dtype", default="float32", help="NumPy backend dtype (default: float32)"
+    )
+
+    recall_parser = subparsers.add_parser(
+        "recall", help="Recall@k of float16/int8 storage against float32"
+    )
+    recall_parser.add_argument(
+        "--queries-file", help="File with one query per line (default: from corpus)"
+    )
+    recall_parser.add_argument(
+        "--queries", type=int, default=100, help="Derived queries if no file given"
+    )
+    recall_parser.add_argument(
+        "--dtypes", default="float16,int8", help="Comma separated dtypes to compare"
+    )
+    recall_parser.add_argument(
+        "--k", type=int, default=settings.top_k_results, help="Results per query"
+    )
+
+    for subparser in (encoding_parser, store_parser, recall_parser):
+        subparser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.benchmark == "encoding":
+        texts = load_corpus_texts(args.limit)
+        if not texts:
+            print(f"❌ No chunks found under {settings.documents_path}")
+            sys.exit(1)
+
+        print(
+            f"\n⚡ Encoding benchmark - {len(texts)} chunks, {settings.embedding_model}"
+        )
+        print("=" * 50)
+        batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+        results = benchmark_encoding(texts, batch_sizes, args.processes, args.repeats)
+    elif args.benchmark == "recall":
+        texts = load_corpus_texts()
+        if not texts:
+            print(f"❌ No chunks found under {settings.documents_path}")
+            sys.exit(1)
+
+        queries = load_queries(args.queries_file, texts, args.queries)
+        print(f"\n🎯 Recall benchmark - {len(texts)} chunks, {len(queries)} queries")
+        print("=" * 50)
+        results = benchmark_recall(texts, queries, args.k, args.dtypes.split(","))
+    else:
+        print(f"\n⚡ Vector store benchmark - top {settings.top_k_results}")
+        print("=" * 50)
+        sizes = [int(size) for size in args.sizes.split(",")]
+        results = benchmark_vector_stores(
+            sizes, args.dim, args.queries, settings.top_k_results, args.dtype
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
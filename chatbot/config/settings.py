@@ -12,20 +12,88 @@ class Settings(BaseSettings):
     model_supports_system_prompt: bool = os.getenv("LLM_SYSTEM_PROMPT", 'True')
     max_tokens: int = int(os.getenv("LLM_MAX_TOKENS", "1000"))
     temperature: float = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+    llm_streaming: bool = os.getenv("LLM_STREAMING", 'False')  # Stream responses to IRC as they are generated
+    pipeline_workers: int = int(os.getenv("PIPELINE_WORKERS", "8"))  # Threads for blocking work in the async pipeline
     ca_cert_path: str = os.getenv("LLM_CA_CERT_PATH", "")  # Path to CA certificate file for self-signed certs
+    http_connect_timeout: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    http_read_timeout: float = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+    http_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    http_max_keepalive_connections: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    llm_retry_base_delay: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    llm_retry_max_delay: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+    llm_retry_status_codes: str = os.getenv("LLM_RETRY_STATUS_CODES", "408,409,429,500,502,503,504")
+    llm_breaker_failure_threshold: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    llm_breaker_reset_timeout: float = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30"))
+    llm_hedge_enabled: bool = os.getenv("LLM_HEDGE_ENABLED", 'False')  # Send a second request when the first is slower than p95
+    llm_hedge_min_samples: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    llm_hedge_min_delay: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+    http_keepalive_expiry: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))  # Seconds an idle connection is kept open
 
     # RAG Configuration
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")  # torch, onnx
+    embedding_onnx_path: str = os.getenv("EMBEDDING_ONNX_PATH", str(Path(__file__).parent.parent / "data" / "onnx"))
+    embedding_onnx_quantization: str = os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2")  # arm64, avx2, avx512, avx512_vnni
+    embedding_backend_tolerance: float = float(os.getenv("EMBEDDING_BACKEND_TOLERANCE", "0.98"))
     chunk_size: int = int(os.getenv("CHUNK_SIZE", "1000"))
     chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "200"))
     top_k_results: int = int(os.getenv("TOP_K_RESULTS", "3"))
+    query_cache_max_entries: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+    query_cache_max_bytes: int = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    query_cache_ttl: float = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+    query_batching: bool = os.getenv("QUERY_BATCHING", 'True')
+    query_batch_max_size: int = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+    query_batch_max_wait: float = float(os.getenv("QUERY_BATCH_MAX_WAIT", "0.002"))
+    retrieval_cache_max_entries: int = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "512"))
+    retrieval_cache_ttl: float = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+    speculative_retrieval: bool = os.getenv("SPECULATIVE_RETRIEVAL", 'True')  # Retrieve context while the input guards run
 
     # Vector Database
     vector_db_path: str = os.getenv("VECTOR_DB_PATH", str(Path(__file__).parent.parent / "data" / "vectordb"))
+    vector_store_backend: str = os.getenv("VECTOR_STORE_BACKEND", "chroma")  # chroma, numpy
+    vector_store_dtype: str = os.getenv("VECTOR_STORE_DTYPE", "float32")  # float32, float16, int8 (numpy backend)
     documents_path: str = os.getenv("DOCUMENTS_PATH", str(Path(__file__).parent.parent / "data" / "documents"))
+    ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+    ingest_queue_size: int = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", "1"))  # 0 = one per CPU, 1 = serial
+    encode_batch_size: int = int(os.getenv("ENCODE_BATCH_SIZE", "32"))
+    encode_sort_by_length: bool = os.getenv("ENCODE_SORT_BY_LENGTH", 'True')
+    encode_processes: int = int(os.getenv("ENCODE_PROCESSES", "1"))  # 0 = one per CPU
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", 'True')
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", str(Path(__file__).parent.parent / "data" / "embedding_cache"))
+    response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", 'True')
+    response_cache_path: str = os.getenv("RESPONSE_CACHE_PATH", str(Path(__file__).parent.parent / "data" / "response_cache"))
+    response_cache_threshold: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))  # Minimum cosine similarity of the questions
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+    response_cache_save_delay: float = float(os.getenv("RESPONSE_CACHE_SAVE_DELAY", "1"))  # 0 = save on every change
 
     # Guardrails
     guardrails_config: str = os.getenv("GUARDRAILS_CONFIG", str(Path(__file__).parent / "guardrails.yaml"))
+    guardrails_hot_reload: bool = os.getenv("GUARDRAILS_HOT_RELOAD", 'True')
+    guardrails_reload_interval: float = float(os.getenv("GUARDRAILS_RELOAD_INTERVAL", "5"))
+    jailbreak_batching: bool = os.getenv("JAILBREAK_BATCHING", 'True')
+    jailbreak_batch_max_size: int = int(os.getenv("JAILBREAK_BATCH_MAX_SIZE", "16"))
+    jailbreak_batch_max_wait: float = float(os.getenv("JAILBREAK_BATCH_MAX_WAIT", "0.005"))
+    jailbreak_window_size: int = int(os.getenv("JAILBREAK_WINDOW_SIZE", "1200"))
+    jailbreak_window_stride: int = int(os.getenv("JAILBREAK_WINDOW_STRIDE", "1000"))
+    judge_max_tokens: int = int(os.getenv("JUDGE_MAX_TOKENS", "1"))
+    judge_temperature: float = float(os.getenv("JUDGE_TEMPERATURE", "0"))
+    judge_fallback_max_tokens: int = int(os.getenv("JUDGE_FALLBACK_MAX_TOKENS", "8"))  # 0 = no second call
+    judge_logprobs: bool = os.getenv("JUDGE_LOGPROBS", 'True')
+    judge_threshold: float = float(os.getenv("JUDGE_THRESHOLD", "0.5"))
+    verdict_cache_enabled: bool = os.getenv("VERDICT_CACHE_ENABLED", 'True')
+    verdict_cache_path: str = os.getenv("VERDICT_CACHE_PATH", str(Path(__file__).parent.parent / "data" / "verdict_cache" / "verdicts.json"))
+    verdict_cache_max_entries: int = int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", "10000"))
+    verdict_cache_pass_ttl: float = float(os.getenv("VERDICT_CACHE_PASS_TTL", "86400"))
+    verdict_cache_fail_ttl: float = float(os.getenv("VERDICT_CACHE_FAIL_TTL", "604800"))
+    verdict_cache_save_delay: float = float(os.getenv("VERDICT_CACHE_SAVE_DELAY", "1"))  # 0 = save on every change
+    prompt_classifier_enabled: bool = os.getenv("PROMPT_CLASSIFIER_ENABLED", 'True')
+    prompt_classifier_path: str = os.getenv("PROMPT_CLASSIFIER_PATH", str(Path(__file__).parent.parent / "data" / "prompt_classifier" / "unusual_prompt.json"))
+    prompt_classifier_examples: str = os.getenv("PROMPT_CLASSIFIER_EXAMPLES", str(Path(__file__).parent / "unusual_prompt_examples.yaml"))
+    prompt_classifier_pass_below: str = os.getenv("PROMPT_CLASSIFIER_PASS_BELOW", "")  # empty = calibrated by training, 0 = never pass locally
+    prompt_classifier_fail_above: float = float(os.getenv("PROMPT_CLASSIFIER_FAIL_ABOVE", "0.8"))
     guardrails_api_key: str = os.getenv("GUARDRAILS_API_KEY", "")
     guardrails_id: str = os.getenv("GUARDRAILS_ID", "")
 
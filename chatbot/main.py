@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
 import sys
 import argparse
+import atexit
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+from config.settings import settings  # noqa: E402
 from src.pipeline.graph import ChatbotGraph  # noqa: E402
 from src.utils.logging import setup_logger  # noqa: E402
-from src.utils.metrics import token_metrics, security_metrics  # noqa: E402
+from src.utils.metrics import token_metrics, security_metrics, runtime_metrics  # noqa: E402
 from src.utils.irc import IrcBot  # noqa: E402
+from src.rag.documents import MarkdownDocumentProcessor  # noqa: E402
+from src.rag.encoder import compare_backends, export_onnx_model  # noqa: E402
+from src.security.prompt_classifier import train_prompt_classifier  # noqa: E402
 
 logger = setup_logger(__name__)
 
@@ -23,6 +28,11 @@ def main():
         action="store_true",
         help="Initialize knowledge base from documents",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="With --init-kb, only embed new or changed documents",
+    )
     parser.add_argument(
         "--kb-info", action="store_true", help="Show knowledge base information"
     )
@@ -31,25 +41,76 @@ def main():
         action="store_true",
         help="Get messages from IRC instead of command line",
     )
+    parser.add_argument(
+        "--export-onnx",
+        action="store_true",
+        help="Export the embedding model to a quantized ONNX model",
+    )
+    parser.add_argument(
+        "--check-embedding-backend",
+        action="store_true",
+        help="Check that torch and ONNX embeddings agree on the corpus",
+    )
+    parser.add_argument(
+        "--train-prompt-classifier",
+        action="store_true",
+        help="Train the local unusual prompt classifier on its example prompts",
+    )
     parser.add_argument(
         "--usage-report", action="store_true", help="Show token usage report"
     )
     parser.add_argument(
         "--security-report", action="store_true", help="Show security events report"
     )
+    parser.add_argument(
+        "--runtime-report",
+        action="store_true",
+        help="Show in-process runtime metrics (latencies, caches, batching) on exit",
+    )
     parser.add_argument(
         "--hours", type=int, default=24, help="Hours back for reports (default: 24)"
     )
     args = parser.parse_args()
 
     try:
+        # Embedding backend maintenance does not need the full pipeline
+        if args.export_onnx:
+            logger.info("Exporting quantized ONNX embedding model...")
+            path = export_onnx_model()
+            logger.info(f"Quantized ONNX model written to {path}")
+            return
+
+        if args.check_embedding_backend:
+            processor = MarkdownDocumentProcessor()
+            texts = [
+                chunk.page_content
+                for _, chunks in processor.iter_processed()
+                for chunk in chunks
+            ][:200]
+            result = compare_backends(texts or ["Divano Divino automated support."])
+            logger.info(
+                f"Embedding backends on {result['texts']} texts: "
+                f"min cosine {result['min_cosine']:.5f}, "
+                f"mean cosine {result['mean_cosine']:.5f}, "
+                f"tolerance {result['tolerance']}"
+            )
+            if not result["passed"]:
+                logger.error("ONNX embeddings differ from torch beyond tolerance")
+                sys.exit(1)
+            return
+
+        if args.train_prompt_classifier:
+            logger.info("Training prompt classifier...")
+            train_prompt_classifier()
+            return
+
         # Initialize chatbot
         chatbot = ChatbotGraph()
 
         # Handle special commands
         if args.init_kb:
             logger.info("Initializing knowledge base...")
-            chatbot.initialize_knowledge_base()
+            chatbot.initialize_knowledge_base(incremental=args.incremental)
             logger.info("Knowledge base initialized successfully!")
             return
 
@@ -69,9 +130,17 @@ def main():
             security_metrics.logger.info_security_report(args.hours)
             return
 
+        # Runtime metrics only live in this process, so report them when the
+        # session ends, however it ends
+        if args.runtime_report:
+            atexit.register(runtime_metrics.print_runtime_report)
+
         if args.irc_mode:
             logger.info("Starting IRC Chatbot.")
-            bot = IrcBot(chatbot.process_message)
+            if settings.llm_streaming:
+                bot = IrcBot(chatbot.astream_message)
+            else:
+                bot = IrcBot(chatbot.aprocess_message)
             bot.start()
         else:
             # Main chat loop
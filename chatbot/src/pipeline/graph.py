@@ -1,5 +1,6 @@
-from typing import Dict, Any
-from langgraph.graph import StateGraph, END
+from typing import AsyncIterator, Dict, Any
+from langgraph.graph import StateGraph, START, END
+from config.settings import settings
 from typing_extensions import TypedDict
 from .nodes import ChatbotPipeline
 
@@ -8,6 +9,9 @@ class ChatbotState(TypedDict):
     user_input: str
     validated_input: str
     context: str
+    retrieval_query: str
+    kb_version: str
+    cache_hit: bool
     llm_response: str
     response: str
     error: str
@@ -17,29 +21,92 @@ class ChatbotGraph:
     def __init__(self):
         self.pipeline = ChatbotPipeline()
         self.graph = self._create_graph()
+        self.async_graph = self._create_graph(asynchronous=True)
+        # Validation and retrieval only, generation is streamed separately
+        self.retrieval_graph = self._create_graph(asynchronous=True, generation=False)
 
-    def _create_graph(self) -> StateGraph:
+    def _create_graph(
+        self, asynchronous: bool = False, generation: bool = True
+    ) -> StateGraph:
         workflow = StateGraph(ChatbotState)
+        pipeline = self.pipeline
 
         # Add nodes
-        workflow.add_node("input_validation", self.pipeline.input_validation_node)
-        workflow.add_node("context_retrieval", self.pipeline.context_retrieval_node)
-        workflow.add_node("llm_generation", self.pipeline.llm_generation_node)
-        workflow.add_node("output_validation", self.pipeline.output_validation_node)
+        if asynchronous:
+            nodes = {
+                "input_validation": pipeline.ainput_validation_node,
+                "context_retrieval": pipeline.acontext_retrieval_node,
+                "speculative_retrieval": pipeline.aspeculative_retrieval_node,
+                "validation_gate": pipeline.avalidation_gate_node,
+                "response_cache": pipeline.aresponse_cache_node,
+                "llm_generation": pipeline.allm_generation_node,
+                "output_validation": pipeline.aoutput_validation_node,
+            }
+        else:
+            nodes = {
+                "input_validation": pipeline.input_validation_node,
+                "context_retrieval": pipeline.context_retrieval_node,
+                "speculative_retrieval": pipeline.speculative_retrieval_node,
+                "validation_gate": pipeline.validation_gate_node,
+                "response_cache": pipeline.response_cache_node,
+                "llm_generation": pipeline.llm_generation_node,
+                "output_validation": pipeline.output_validation_node,
+            }
 
-        # Define the flow
-        workflow.set_entry_point("input_validation")
+        if settings.speculative_retrieval:
+            # Retrieval runs alongside the guards and both branches join at
+            # the gate, which drops the context if validation failed
+            for name in (
+                "input_validation",
+                "speculative_retrieval",
+                "validation_gate",
+                "response_cache",
+            ):
+                workflow.add_node(name, nodes[name])
 
-        # Add conditional edges
-        workflow.add_conditional_edges(
-            "input_validation",
-            self._should_continue_after_validation,
-            {"continue": "context_retrieval", "end": END},
-        )
+            workflow.add_edge(START, "input_validation")
+            workflow.add_edge(START, "speculative_retrieval")
+            workflow.add_edge(
+                ["input_validation", "speculative_retrieval"], "validation_gate"
+            )
+            workflow.add_conditional_edges(
+                "validation_gate",
+                self._should_continue_after_validation,
+                {"continue": "response_cache", "end": END},
+            )
+            workflow.add_conditional_edges(
+                "response_cache",
+                self._should_generate,
+                {"generate": "llm_generation" if generation else END, "cached": END},
+            )
+        else:
+            for name in ("input_validation", "response_cache", "context_retrieval"):
+                workflow.add_node(name, nodes[name])
+
+            # Define the flow
+            workflow.set_entry_point("input_validation")
+
+            # Add conditional edges
+            workflow.add_conditional_edges(
+                "input_validation",
+                self._should_continue_after_validation,
+                {"continue": "response_cache", "end": END},
+            )
+            # Check the cache first so that hits skip retrieval as well
+            workflow.add_conditional_edges(
+                "response_cache",
+                self._should_generate,
+                {"generate": "context_retrieval", "cached": END},
+            )
+            workflow.add_edge(
+                "context_retrieval", "llm_generation" if generation else END
+            )
 
-        workflow.add_edge("context_retrieval", "llm_generation")
-        workflow.add_edge("llm_generation", "output_validation")
-        workflow.add_edge("output_validation", END)
+        if generation:
+            workflow.add_node("llm_generation", nodes["llm_generation"])
+            workflow.add_node("output_validation", nodes["output_validation"])
+            workflow.add_edge("llm_generation", "output_validation")
+            workflow.add_edge("output_validation", END)
 
         return workflow.compile()
 
@@ -48,6 +115,12 @@ class ChatbotGraph:
             return "end"
         return "continue"
 
+    def _should_generate(self, state: ChatbotState) -> str:
+        # Cached responses were validated when they were stored
+        if state.get("cache_hit"):
+            return "cached"
+        return "generate"
+
     def process_message(self, user_input: str) -> str:
         initial_state = {"user_input": user_input}
 
@@ -59,8 +132,36 @@ class ChatbotGraph:
         except Exception as e:
             return f"An error occurred: {str(e)}"
 
-    def initialize_knowledge_base(self):
-        self.pipeline.retriever.initialize_knowledge_base()
+    async def aprocess_message(self, user_input: str) -> str:
+        initial_state = {"user_input": user_input}
+
+        try:
+            result = await self.async_graph.ainvoke(initial_state)
+            return result.get(
+                "response", "Customer service closed, go complain to someone else."
+            )
+        except Exception as e:
+            return f"An error occurred: {str(e)}"
+
+    async def astream_message(self, user_input: str) -> AsyncIterator[str]:
+        """Yield the response as text deltas while it is being generated."""
+        initial_state = {"user_input": user_input}
+
+        try:
+            state = await self.retrieval_graph.ainvoke(initial_state)
+            if "error" in state or state.get("cache_hit"):
+                yield state.get(
+                    "response", "Customer service closed, go complain to someone else."
+                )
+                return
+
+            async for delta in self.pipeline.astream_generation_node(state):
+                yield delta
+        except Exception as e:
+            yield f"An error occurred: {str(e)}"
+
+    def initialize_knowledge_base(self, incremental: bool = False):
+        self.pipeline.retriever.initialize_knowledge_base(incremental=incremental)
 
     def get_knowledge_base_info(self) -> Dict[str, Any]:
         return self.pipeline.retriever.get_knowledge_base_info()
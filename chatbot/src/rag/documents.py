@@ -1,11 +1,57 @@
+import hashlib
 import markdown
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from config.settings import settings
 
 
+def chunk_id(source: str, content: str) -> str:
+    """Stable id for a chunk, derived from its source file and text."""
+    digest = hashlib.sha256(f"{source}\0{content}".encode("utf-8")).hexdigest()
+    return digest[:32]
+
+
+# A spawned worker re-imports the entry script and this module before its
+# first file, so a pool only pays off with enough files for every worker.
+# Keep this module's imports light: pool workers load nothing else.
+MIN_FILES_PER_WORKER = 1000
+
+_worker_processor = None
+
+
+def _process_file(
+    md_file: str, known_hash: Optional[str] = None
+) -> Tuple[Optional[Document], Optional[List[Document]], str]:
+    """Load, convert and split one file; runs inside pool worker processes.
+
+    A file whose source hash equals known_hash is only read and hashed: its
+    document carries the metadata without text and its chunks are None.
+    """
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = MarkdownDocumentProcessor()
+
+    try:
+        with open(md_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        source_hash = _worker_processor.source_hash(content)
+        if source_hash == known_hash:
+            metadata = _worker_processor.file_metadata(Path(md_file), source_hash)
+            return Document(page_content="", metadata=metadata), None, ""
+
+        document = _worker_processor.convert_document(Path(md_file), content)
+        return document, _worker_processor.split_documents([document]), ""
+    except Exception as e:
+        return None, [], str(e)
+
+
 class MarkdownDocumentProcessor:
     def __init__(self):
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -13,44 +59,153 @@ class MarkdownDocumentProcessor:
             chunk_overlap=settings.chunk_overlap,
             separators=["\n\n", "\n", " ", ""],
         )
+        # Splitter parameters are part of every source hash so that changing
+        # them re-chunks all files on the next incremental sync.
+        self.fingerprint = f"{settings.chunk_size}:{settings.chunk_overlap}"
+        # Sources that failed to load during the last iter_processed run
+        self.failed_sources: List[str] = []
 
     def load_documents(self) -> List[Document]:
-        documents = []
+        return list(self.iter_documents())
+
+    def list_files(self) -> List[Path]:
         documents_path = Path(settings.documents_path)
 
         if not documents_path.exists():
             print(f"Documents directory not found: {documents_path}")
-            return documents
+            return []
 
-        for md_file in documents_path.glob("**/*.md"):
-            try:
-                with open(md_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                # Convert markdown to plain text for better chunking
-                html = markdown.markdown(content)
-                # Simple HTML tag removal for plain text
-                import re
-
-                text = re.sub(r"<[^>]+>", "", html)
-
-                doc = Document(
-                    page_content=text,
-                    metadata={
-                        "source": str(md_file),
-                        "filename": md_file.name,
-                        "type": "markdown",
-                    },
-                )
-                documents.append(doc)
+        return sorted(documents_path.glob("**/*.md"))
 
+    def iter_documents(self) -> Iterator[Document]:
+        """Yield one converted document per markdown file, in path order."""
+        for md_file in self.list_files():
+            try:
+                yield self.load_document(md_file)
             except Exception as e:
                 print(f"Error loading {md_file}: {e}")
 
-        return documents
+    def iter_processed(
+        self,
+        workers: Optional[int] = None,
+        known_hashes: Optional[Dict[str, str]] = None,
+    ) -> Iterator[Tuple[Document, Optional[List[Document]]]]:
+        """Yield (document, chunks) per file, in path order.
+
+        Reading, conversion and splitting are spread over a process pool of
+        up to INGEST_WORKERS processes (0 means one per CPU), with at least
+        MIN_FILES_PER_WORKER files per process; smaller corpora are processed
+        serially. At most a few files per worker are in flight, so memory
+        stays bounded. Workers are spawned rather than forked, because
+        callers run ingestion threads.
+
+        Files whose source hash matches known_hashes (source path -> hash)
+        are not converted or split; they are yielded with None chunks.
+        Files that fail to load are reported, skipped and listed in
+        failed_sources, so callers can tell them apart from removed files.
+        """
+        if workers is None:
+            workers = settings.ingest_workers
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+
+        known_hashes = known_hashes or {}
+        self.failed_sources = []
+        files = [str(md_file) for md_file in self.list_files()]
+        workers = min(workers, len(files) // MIN_FILES_PER_WORKER)
+        if workers <= 1:
+            results: Iterable = (
+                _process_file(md_file, known_hashes.get(md_file)) for md_file in files
+            )
+            yield from self._report_errors(files, results)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            yield from self._report_errors(
+                files,
+                self._ordered_results(executor, files, known_hashes, workers * 4),
+            )
+
+    def _ordered_results(
+        self,
+        executor: ProcessPoolExecutor,
+        files: List[str],
+        known_hashes: Dict[str, str],
+        window: int,
+    ) -> Iterator[Tuple[Optional[Document], Optional[List[Document]], str]]:
+        pending: deque = deque()
+        remaining = iter(files)
+
+        def submit(md_file: str) -> None:
+            pending.append(
+                executor.submit(_process_file, md_file, known_hashes.get(md_file))
+            )
+
+        for md_file in remaining:
+            submit(md_file)
+            if len(pending) >= window:
+                break
+
+        while pending:
+            result = pending.popleft().result()
+            next_file = next(remaining, None)
+            if next_file is not None:
+                submit(next_file)
+            yield result
+
+    def _report_errors(
+        self, files: List[str], results: Iterable
+    ) -> Iterator[Tuple[Document, Optional[List[Document]]]]:
+        for md_file, (document, chunks, error) in zip(files, results):
+            if document is None:
+                print(f"Error loading {md_file}: {error}")
+                self.failed_sources.append(md_file)
+                continue
+            yield document, chunks
+
+    def load_document(self, md_file: Path) -> Document:
+        with open(md_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        return self.convert_document(md_file, content)
+
+    def source_hash(self, content: str) -> str:
+        return hashlib.sha256(
+            f"{self.fingerprint}\0{content}".encode("utf-8")
+        ).hexdigest()
+
+    def file_metadata(self, md_file: Path, source_hash: str) -> dict:
+        return {
+            "source": str(md_file),
+            "filename": md_file.name,
+            "type": "markdown",
+            "source_hash": source_hash,
+        }
+
+    def convert_document(self, md_file: Path, content: str) -> Document:
+        # Convert markdown to plain text for better chunking
+        html = markdown.markdown(content)
+        # Simple HTML tag removal for plain text
+        text = re.sub(r"<[^>]+>", "", html)
+
+        return Document(
+            page_content=text,
+            metadata=self.file_metadata(md_file, self.source_hash(content)),
+        )
 
     def split_documents(self, documents: List[Document]) -> List[Document]:
-        return self.text_splitter.split_documents(documents)
+        chunks = self.text_splitter.split_documents(documents)
+
+        # Identical text can repeat within one file, so number the duplicates
+        seen = {}
+        for chunk in chunks:
+            base_id = chunk_id(chunk.metadata["source"], chunk.page_content)
+            count = seen.get(base_id, 0)
+            seen[base_id] = count + 1
+            chunk.metadata["chunk_id"] = f"{base_id}-{count}" if count else base_id
+
+        return chunks
 
     def process_documents(self) -> List[Document]:
         raw_documents = self.load_documents()
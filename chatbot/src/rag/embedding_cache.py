@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent cache of document embeddings keyed by model name and text hash.
+
+    Vectors live in one append-only float32 file that is read through a
+    memory map, and a JSON index maps each text hash to its row. Every model
+    gets its own directory, so switching models never returns stale vectors.
+    """
+
+    INDEX_FILE = "index.json"
+    VECTORS_FILE = "vectors.f32"
+
+    def __init__(self, cache_dir: str, model_name: str):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.model_name = model_name
+        self.path = Path(cache_dir) / safe_name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.path / self.INDEX_FILE
+        self.vectors_path = self.path / self.VECTORS_FILE
+
+        self.dim: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self.last_used: Dict[str, float] = {}
+        self._vectors: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if not self.index_path.exists():
+            return
+
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable embedding cache index {self.index_path}: {e}")
+            return
+
+        self.dim = index.get("dim")
+        for key, entry in index.get("entries", {}).items():
+            self.rows[key] = entry["row"]
+            self.last_used[key] = entry.get("last_used", 0.0)
+
+        # Drop rows that point past the end of a truncated vectors file
+        row_count = self._row_count()
+        self.rows = {k: r for k, r in self.rows.items() if r < row_count}
+
+    def _row_count(self) -> int:
+        if not self.dim or not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (self.dim * 4)
+
+    def _vector_map(self) -> Optional[np.memmap]:
+        if self._vectors is None:
+            row_count = self._row_count()
+            if row_count == 0:
+                return None
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(row_count, self.dim)
+            )
+        return self._vectors
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the keys that are present."""
+        found = {}
+        vectors = self._vector_map()
+        now = time.time()
+
+        for key in keys:
+            row = self.rows.get(key)
+            if row is None or vectors is None:
+                self.misses += 1
+                continue
+            found[key] = np.array(vectors[row])
+            self.last_used[key] = now
+            self.hits += 1
+
+        return found
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Append vectors for new keys; keys already cached are skipped."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(keys) == 0:
+            return
+
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match cache "
+                f"dimension {self.dim}"
+            )
+
+        new_rows = []
+        next_row = self._row_count()
+        now = time.time()
+        for key, vector in zip(keys, vectors):
+            if key in self.rows:
+                continue
+            self.rows[key] = next_row
+            self.last_used[key] = now
+            new_rows.append(vector)
+            next_row += 1
+
+        if new_rows:
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.stack(new_rows).astype(np.float32).tobytes())
+            self._vectors = None
+
+    def flush(self) -> None:
+        """Write the index atomically next to the vectors file."""
+        index = {
+            "model": self.model_name,
+            "dim": self.dim,
+            "entries": {
+                key: {"row": row, "last_used": self.last_used.get(key, 0.0)}
+                for key, row in self.rows.items()
+            },
+        }
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def compact(
+        self,
+        live_keys: Optional[Iterable[str]] = None,
+        max_age_days: Optional[float] = None,
+    ) -> int:
+        """Drop entries not in live_keys or unused for max_age_days.
+
+        Rewrites the vectors file without the dropped rows and returns how
+        many entries were removed.
+        """
+        keep = set(self.rows)
+        if live_keys is not None:
+            keep &= set(live_keys)
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            keep = {k for k in keep if self.last_used.get(k, 0.0) >= cutoff}
+
+        removed = len(self.rows) - len(keep)
+        if removed == 0:
+            return 0
+
+        vectors = self._vector_map()
+        ordered = sorted(keep, key=lambda k: self.rows[k])
+        tmp_path = self.vectors_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            for key in ordered:
+                f.write(np.asarray(vectors[self.rows[key]], dtype=np.float32).tobytes())
+
+        self._vectors = None
+        os.replace(tmp_path, self.vectors_path)
+        self.rows = {key: row for row, key in enumerate(ordered)}
+        self.last_used = {k: self.last_used.get(k, 0.0) for k in ordered}
+        self.flush()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "entries": len(self.rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "size_bytes": self._row_count() * (self.dim or 0) * 4,
+        }
@@ -1,16 +1,105 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+import numpy as np
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Dict, Any
 from langchain_core.documents import Document
 from config.settings import settings
+from src.utils.batching import MicroBatcher
+from src.utils.cache import LRUCache, normalize_text
+from .embedding_cache import EmbeddingCache, text_hash
+from .encoder import DocumentEncoder, embedding_model_id, load_embedding_model
+from .vector_store import create_vector_store
 
 
 class EmbeddingService:
+    # Seconds between embedding cache index writes during a long ingestion
+    CACHE_FLUSH_INTERVAL = 60.0
+
     def __init__(self):
-        self.model = SentenceTransformer(settings.embedding_model)
-        self.client = chromadb.PersistentClient(path=settings.vector_db_path)
-        self.collection = self.client.get_or_create_collection(
-            name="documents", metadata={"hnsw:space": "cosine"}
+        self.model = load_embedding_model()
+        self.encoder = DocumentEncoder(self.model)
+        self.store = create_vector_store()
+        self.cache = None
+        if settings.embedding_cache_enabled:
+            self.cache = EmbeddingCache(
+                settings.embedding_cache_path, embedding_model_id()
+            )
+        self._cache_flushed_at = time.monotonic()
+        self.version_path = Path(settings.vector_db_path) / "collection.version"
+        self.query_cache = LRUCache(
+            "query_embedding",
+            max_entries=settings.query_cache_max_entries,
+            max_bytes=settings.query_cache_max_bytes,
+            ttl=settings.query_cache_ttl,
+        )
+        # Concurrent sessions share one forward pass for their queries
+        self.query_encoder = None
+        if settings.query_batching:
+            self.query_encoder = MicroBatcher(
+                "query_encoding",
+                self._encode_queries,
+                max_batch_size=settings.query_batch_max_size,
+                max_wait=settings.query_batch_max_wait,
+            )
+
+    def encode_documents(
+        self, texts: List[str], show_progress_bar: bool = True
+    ) -> np.ndarray:
+        """Encode texts, reusing vectors from the embedding cache if enabled."""
+        if self.cache is None:
+            return self.encoder.encode(texts, show_progress_bar=show_progress_bar)
+
+        keys = [text_hash(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            encoded = self.encoder.encode(
+                list(missing.values()), show_progress_bar=show_progress_bar
+            )
+            self.cache.put_many(list(missing.keys()), encoded)
+            cached.update(zip(missing.keys(), encoded))
+            # The index is rewritten as a whole, so only now and then
+            if time.monotonic() - self._cache_flushed_at >= self.CACHE_FLUSH_INTERVAL:
+                self.flush_cache()
+
+        return np.stack([cached[key] for key in keys])
+
+    def flush_cache(self) -> None:
+        """Write the embedding cache index for vectors added so far."""
+        if self.cache is not None:
+            self.cache.flush()
+            self._cache_flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        """Write the embedding cache index and release encoding workers."""
+        self.flush_cache()
+        self.encoder.close()
+
+    def compact_cache(self, live_keys: Iterable[str]) -> None:
+        """Drop cached vectors whose text hash is no longer part of the corpus."""
+        if self.cache is None:
+            return
+
+        removed = self.cache.compact(live_keys=live_keys)
+        if removed:
+            print(f"Embedding cache compacted: removed {removed} stale entries")
+
+    def print_cache_stats(self) -> None:
+        if self.cache is None:
+            return
+
+        stats = self.cache.stats()
+        print(
+            f"Embedding cache: {stats['hits']}/{stats['hits'] + stats['misses']} "
+            f"chunks reused (hit rate {stats['hit_rate']:.1%}, "
+            f"{stats['entries']} entries)"
         )
 
     def embed_documents(self, documents: List[Document]) -> None:
@@ -18,52 +107,104 @@ class EmbeddingService:
             print("No documents to embed")
             return
 
-        # Prepare data for ChromaDB
+        # Generate embeddings
+        embeddings = self.encode_documents([doc.page_content for doc in documents])
+        self.add_embeddings(documents, embeddings)
+        self.print_cache_stats()
+
+        print(f"Embedded and stored {len(documents)} document chunks")
+
+    def add_embeddings(self, documents: List[Document], embeddings: np.ndarray) -> None:
+        """Store already encoded chunks in the vector store."""
         texts = [doc.page_content for doc in documents]
         metadatas = [doc.metadata for doc in documents]
-        ids = [f"doc_{i}" for i in range(len(documents))]
+        ids = [
+            doc.metadata.get("chunk_id", f"doc_{i}") for i, doc in enumerate(documents)
+        ]
 
-        # Generate embeddings
-        embeddings = self.model.encode(texts, show_progress_bar=True)
-
-        # Store in ChromaDB
-        self.collection.add(
-            embeddings=embeddings.tolist(),
-            documents=texts,
-            metadatas=metadatas,
-            ids=ids,
+        self.store.upsert(ids, embeddings, texts, metadatas)
+        self.bump_collection_version()
+
+    def update_metadata(self, documents: List[Document]) -> None:
+        """Refresh metadata of already embedded chunks without re-encoding."""
+        if not documents:
+            return
+
+        self.store.update_metadata(
+            [doc.metadata["chunk_id"] for doc in documents],
+            [doc.metadata for doc in documents],
         )
+        self.bump_collection_version()
 
-        print(f"Embedded and stored {len(documents)} document chunks")
+    def delete_documents(self, ids: List[str]) -> None:
+        if not ids:
+            return
+
+        self.store.delete(ids)
+        self.bump_collection_version()
+        print(f"Deleted {len(ids)} stale document chunks")
+
+    def get_indexed_sources(self) -> Dict[str, Dict[str, Any]]:
+        """Map each indexed source file to its chunk ids and source hashes."""
+        ids, metadatas = self.store.get_metadata()
+
+        sources: Dict[str, Dict[str, Any]] = {}
+        for chunk_id, metadata in zip(ids, metadatas):
+            metadata = metadata or {}
+            entry = sources.setdefault(
+                metadata.get("source", ""), {"ids": [], "source_hashes": set()}
+            )
+            entry["ids"].append(chunk_id)
+            entry["source_hashes"].add(metadata.get("source_hash"))
+
+        return sources
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Encode a single query, serving repeated questions from the LRU cache."""
+        key = normalize_text(query)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            if self.query_encoder is not None:
+                embedding = self.query_encoder(key)
+            else:
+                embedding = self.model.encode([key])[0]
+            embedding.flags.writeable = False
+            self.query_cache.set(key, embedding)
+        return embedding
+
+    def _encode_queries(self, queries: List[str]) -> List[np.ndarray]:
+        embeddings = self.model.encode(queries, batch_size=len(queries))
+        # Copy the rows so each caller owns its vector
+        return [np.array(embedding) for embedding in embeddings]
 
     def search(self, query: str, k: int = None) -> List[Dict[str, Any]]:
         if k is None:
             k = settings.top_k_results
 
-        query_embedding = self.model.encode([query])
+        return self.store.query(self.embed_query(query), k)
 
-        results = self.collection.query(
-            query_embeddings=query_embedding.tolist(), n_results=k
-        )
+    def get_collection_count(self) -> int:
+        return self.store.count()
 
-        # Format results
-        formatted_results = []
-        for i in range(len(results["documents"][0])):
-            formatted_results.append(
-                {
-                    "content": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "distance": results["distances"][0][i],
-                }
-            )
+    def clear_collection(self) -> None:
+        self.store.clear()
+        self.bump_collection_version()
 
-        return formatted_results
+    def get_collection_version(self) -> str:
+        """Stamp that changes whenever the collection contents change.
 
-    def get_collection_count(self) -> int:
-        return self.collection.count()
+        It is kept in a small file next to the vector database so that a
+        rebuild done by a separate --init-kb process is seen by the bot too.
+        """
+        try:
+            return self.version_path.read_text().strip()
+        except FileNotFoundError:
+            return "0"
 
-    def clear_collection(self) -> None:
-        self.client.delete_collection("documents")
-        self.collection = self.client.get_or_create_collection(
-            name="documents", metadata={"hnsw:space": "cosine"}
-        )
+    def bump_collection_version(self) -> str:
+        version = uuid.uuid4().hex
+        self.version_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.version_path.with_suffix(".tmp")
+        tmp_path.write_text(version)
+        os.replace(tmp_path, self.version_path)
+        return version
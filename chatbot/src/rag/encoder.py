@@ -0,0 +1,162 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config.settings import settings
+
+ONNX_BACKEND = "onnx"
+TORCH_BACKEND = "torch"
+
+
+def embedding_model_id() -> str:
+    """Name of the configured model plus backend, used to namespace caches.
+
+    Quantized ONNX vectors differ slightly from torch ones, so they must not
+    share cached embeddings.
+    """
+    if settings.embedding_backend == ONNX_BACKEND:
+        return f"{settings.embedding_model}@onnx-{settings.embedding_onnx_quantization}"
+    return settings.embedding_model
+
+
+def onnx_model_path() -> Path:
+    return Path(settings.embedding_onnx_path)
+
+
+def onnx_file_name() -> str:
+    return f"onnx/model_qint8_{settings.embedding_onnx_quantization}.onnx"
+
+
+@lru_cache(maxsize=None)
+def load_embedding_model(backend: Optional[str] = None) -> SentenceTransformer:
+    """Load the embedding model once per process and backend.
+
+    The torch backend loads EMBEDDING_MODEL directly. The onnx backend loads
+    the quantized export created by `python main.py --export-onnx`.
+    """
+    backend = backend or settings.embedding_backend
+    if backend == TORCH_BACKEND:
+        return SentenceTransformer(settings.embedding_model)
+    elif backend == ONNX_BACKEND:
+        path = onnx_model_path()
+        if not (path / onnx_file_name()).exists():
+            raise FileNotFoundError(
+                f"Quantized ONNX model not found in {path}. "
+                "Run `python main.py --export-onnx` first."
+            )
+        return SentenceTransformer(
+            str(path),
+            backend=ONNX_BACKEND,
+            model_kwargs={"file_name": onnx_file_name()},
+        )
+    else:
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+
+
+def export_onnx_model() -> Path:
+    """Export EMBEDDING_MODEL to ONNX and write a dynamically quantized copy."""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    path = onnx_model_path()
+    # Loading with the onnx backend converts the torch weights on the fly
+    model = SentenceTransformer(settings.embedding_model, backend=ONNX_BACKEND)
+    model.save(str(path))
+    export_dynamic_quantized_onnx_model(
+        model, settings.embedding_onnx_quantization, str(path)
+    )
+    return path / onnx_file_name()
+
+
+def compare_backends(texts: List[str]) -> Dict[str, Any]:
+    """Encode texts with both backends and report their cosine agreement."""
+    reference = load_embedding_model(TORCH_BACKEND).encode(
+        texts, normalize_embeddings=True
+    )
+    candidate = load_embedding_model(ONNX_BACKEND).encode(
+        texts, normalize_embeddings=True
+    )
+    similarities = np.sum(reference * candidate, axis=1)
+    return {
+        "texts": len(texts),
+        "min_cosine": float(similarities.min()),
+        "mean_cosine": float(similarities.mean()),
+        "tolerance": settings.embedding_backend_tolerance,
+        "passed": bool(similarities.min() >= settings.embedding_backend_tolerance),
+    }
+
+
+class DocumentEncoder:
+    """Batch encoder for document chunks.
+
+    Texts are encoded with an explicit batch size, optionally sorted by
+    length first so that every batch pads to a similar length, and
+    optionally spread over a pool of worker processes (one per CPU core
+    when ENCODE_PROCESSES is 0). Results are returned in input order.
+    """
+
+    def __init__(
+        self,
+        model: SentenceTransformer,
+        batch_size: Optional[int] = None,
+        sort_by_length: Optional[bool] = None,
+        processes: Optional[int] = None,
+    ):
+        self.model = model
+        self.batch_size = batch_size or settings.encode_batch_size
+        self.sort_by_length = (
+            settings.encode_sort_by_length if sort_by_length is None else sort_by_length
+        )
+        if processes is None:
+            processes = settings.encode_processes
+        self.processes = processes if processes > 0 else (os.cpu_count() or 1)
+        self._pool = None
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        if not texts:
+            return np.zeros(
+                (0, self.model.get_sentence_embedding_dimension()), dtype=np.float32
+            )
+
+        order = None
+        if self.sort_by_length:
+            order = np.argsort([len(text) for text in texts], kind="stable")
+            texts = [texts[i] for i in order]
+
+        if self.processes > 1 and len(texts) > self.batch_size:
+            embeddings = self.model.encode_multi_process(
+                texts,
+                self._get_pool(),
+                batch_size=self.batch_size,
+                chunk_size=max(self.batch_size, len(texts) // (self.processes * 4)),
+            )
+        else:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                show_progress_bar=show_progress_bar,
+                convert_to_numpy=True,
+            )
+
+        if order is not None:
+            unsorted = np.empty_like(embeddings)
+            unsorted[order] = embeddings
+            embeddings = unsorted
+
+        return embeddings
+
+    def _get_pool(self):
+        # Starting the pool loads one model copy per process, so reuse it
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(
+                target_devices=["cpu"] * self.processes
+            )
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
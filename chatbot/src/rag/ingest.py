@@ -0,0 +1,155 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from config.settings import settings
+from .documents import MarkdownDocumentProcessor
+from .embedding_cache import text_hash
+from .embeddings import EmbeddingService
+
+_DONE = object()
+
+
+def batched(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class IngestionPipeline:
+    """Bounded-memory load -> convert -> split -> encode -> add pipeline.
+
+    Loading, conversion and splitting are done by the processor's worker
+    pool. Batching, encoding and storing each run in their own thread and
+    hand batches of chunks on through bounded queues, so at most a few
+    batches are in memory at any time and reading files overlaps with
+    encoding and storing.
+    """
+
+    def __init__(
+        self,
+        processor: MarkdownDocumentProcessor,
+        embedding_service: EmbeddingService,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.processor = processor
+        self.embedding_service = embedding_service
+        self.batch_size = batch_size or settings.ingest_batch_size
+        self.queue_size = queue_size or settings.ingest_queue_size
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self.stats: Dict[str, int] = {"documents": 0, "chunks": 0, "batches": 0}
+        self.live_keys: set = set()
+
+    def run(self) -> Dict[str, int]:
+        """Ingest every markdown file under DOCUMENTS_PATH."""
+        documents = self.processor.iter_processed()
+
+        chunk_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        encoded_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        stages = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._split_stage, documents, chunk_queue),
+                name="ingest-split",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._encode_stage, self._drain(chunk_queue), encoded_queue),
+                name="ingest-encode",
+                daemon=True,
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            for chunks, embeddings in self._drain(encoded_queue):
+                self.embedding_service.add_embeddings(chunks, embeddings)
+                self.stats["batches"] += 1
+                print(f"Stored {self.stats['chunks']} chunks so far")
+        except BaseException as e:
+            self._errors.append(e)
+        finally:
+            self._stop.set()
+            for stage in stages:
+                stage.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+        self.embedding_service.print_cache_stats()
+        print(
+            f"Ingested {self.stats['documents']} documents into "
+            f"{self.stats['chunks']} chunks in {self.stats['batches']} batches"
+        )
+        return self.stats
+
+    def _split_stage(
+        self, processed: Iterable[Tuple[Document, List[Document]]]
+    ) -> Iterator[List[Document]]:
+        def chunks():
+            for _, document_chunks in processed:
+                self.stats["documents"] += 1
+                yield from document_chunks
+
+        yield from batched(chunks(), self.batch_size)
+
+    def _encode_stage(self, batches: Iterable[List[Document]]) -> Iterator[tuple]:
+        for chunks in batches:
+            texts = [chunk.page_content for chunk in chunks]
+            self.live_keys.update(text_hash(text) for text in texts)
+            embeddings = self.embedding_service.encode_documents(
+                texts, show_progress_bar=False
+            )
+            self.stats["chunks"] += len(chunks)
+            yield chunks, embeddings
+
+    def _run_stage(
+        self,
+        stage: Callable[[Iterable[Any]], Iterator[Any]],
+        source: Iterable[Any],
+        output: queue.Queue,
+    ) -> None:
+        try:
+            for item in stage(source):
+                if not self._put(output, item):
+                    return
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._put(output, _DONE)
+
+    def _put(self, output: queue.Queue, item: Any) -> bool:
+        # Poll so that a failing downstream stage never leaves us blocked
+        while not self._stop.is_set() or item is _DONE:
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if item is _DONE and self._stop.is_set():
+                    return False
+        return False
+
+    def _drain(self, source: queue.Queue) -> Iterator[Any]:
+        while True:
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _DONE:
+                return
+            yield item
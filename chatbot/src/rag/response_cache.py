@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.utils.cache import DebouncedSaver, normalize_text
+from src.utils.metrics import runtime_metrics
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticResponseCache:
+    """Validated responses keyed by the embedding of the question.
+
+    A lookup returns the stored response of the most similar earlier
+    question if its cosine similarity reaches the threshold and it was
+    answered against the same knowledge base version. Entries expire after
+    the TTL, and the least recently used entries are evicted beyond
+    max_entries.
+
+    Embeddings live in one preallocated matrix with a row per entry, so a
+    lookup is a single matrix-vector product and hits never restack it;
+    removed rows are filled with the last row. The entries, including their
+    LRU order and last use, are saved in the background at most once per
+    save_delay seconds so that they survive restarts. Hits and misses are
+    counted in runtime_metrics under "cache.semantic_response.*".
+    """
+
+    ENTRIES_FILE = "entries.json"
+    EMBEDDINGS_FILE = "embeddings.npy"
+    METRICS_NAME = "cache.semantic_response"
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float,
+        max_entries: int,
+        ttl: float,
+        save_delay: float = 1.0,
+    ):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Matrix rows in use, the key of each row and the row of each key
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._saver = DebouncedSaver(self._save, save_delay)
+        self._load()
+
+    def lookup(self, embedding: np.ndarray, version: str) -> Optional[str]:
+        with self._lock:
+            dropped = self._drop_stale(version)
+            response = self._best_match(embedding)
+        # A hit changes the LRU order, which is saved as well
+        if dropped or response is not None:
+            self._saver.request()
+        return response
+
+    def _best_match(self, embedding: np.ndarray) -> Optional[str]:
+        if not self._entries:
+            runtime_metrics.increment(f"{self.METRICS_NAME}.misses")
+            return None
+
+        similarities = self._matrix[: len(self._keys)] @ _unit(embedding)
+        best = int(np.argmax(similarities))
+        runtime_metrics.observe(
+            f"{self.METRICS_NAME}.similarity", float(similarities[best])
+        )
+        if similarities[best] < self.threshold:
+            runtime_metrics.increment(f"{self.METRICS_NAME}.misses")
+            return None
+
+        key = self._keys[best]
+        entry = self._entries[key]
+        entry["last_used"] = time.time()
+        self._entries.move_to_end(key)
+        runtime_metrics.increment(f"{self.METRICS_NAME}.hits")
+        return entry["response"]
+
+    def store(
+        self, query: str, embedding: np.ndarray, response: str, version: str
+    ) -> None:
+        key = normalize_text(query)
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {
+                "response": response,
+                "version": version,
+                "created_at": now,
+                "last_used": now,
+            }
+            self._set_row(key, _unit(embedding))
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._remove_row(oldest)
+                runtime_metrics.increment(f"{self.METRICS_NAME}.evictions")
+        self._saver.request()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._keys = []
+            self._rows = {}
+        self._saver.request()
+
+    def flush(self) -> None:
+        """Write pending changes now instead of after save_delay."""
+        self._saver.flush()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = runtime_metrics.get_counter(f"{self.METRICS_NAME}.hits")
+        misses = runtime_metrics.get_counter(f"{self.METRICS_NAME}.misses")
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / (hits + misses)) if hits + misses else 0.0,
+        }
+
+    def _drop_stale(self, version: str) -> bool:
+        # The knowledge base version only moves forward, so answers given
+        # against any other version can never be served again
+        cutoff = time.time() - self.ttl if self.ttl else None
+        stale = [
+            key
+            for key, entry in self._entries.items()
+            if entry["version"] != version
+            or (cutoff is not None and entry["created_at"] < cutoff)
+        ]
+        for key in stale:
+            del self._entries[key]
+            self._remove_row(key)
+        return bool(stale)
+
+    def _set_row(self, key: str, embedding: np.ndarray) -> None:
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if self._matrix is None or row == len(self._matrix):
+                # Grow by doubling so that appends stay amortized O(1)
+                grown = np.zeros(
+                    (max(16, 2 * row), len(embedding)), dtype=np.float32
+                )
+                if self._matrix is not None:
+                    grown[:row] = self._matrix
+                self._matrix = grown
+            self._keys.append(key)
+            self._rows[key] = row
+        self._matrix[row] = embedding
+
+    def _remove_row(self, key: str) -> None:
+        row = self._rows.pop(key)
+        last_key = self._keys.pop()
+        if last_key != key:
+            self._matrix[row] = self._matrix[len(self._keys)]
+            self._keys[row] = last_key
+            self._rows[last_key] = row
+
+    def _load(self) -> None:
+        entries_path = self.path / self.ENTRIES_FILE
+        embeddings_path = self.path / self.EMBEDDINGS_FILE
+        if not entries_path.exists() or not embeddings_path.exists():
+            return
+
+        try:
+            with open(entries_path, "r") as f:
+                entries = json.load(f)
+            embeddings = np.load(embeddings_path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable response cache in {self.path}: {e}")
+            return
+
+        if len(entries) != len(embeddings):
+            print(f"Ignoring inconsistent response cache in {self.path}")
+            return
+
+        for entry, embedding in zip(entries, embeddings):
+            key = entry.pop("query")
+            self._entries[key] = entry
+            self._set_row(key, np.asarray(embedding, dtype=np.float32))
+
+    def _save(self) -> None:
+        # Entries and embeddings are written in LRU order
+        with self._lock:
+            entries = [{"query": key, **entry} for key, entry in self._entries.items()]
+            embeddings = (
+                self._matrix[[self._rows[key] for key in self._entries]]
+                if self._entries
+                else np.zeros((0, 0), dtype=np.float32)
+            )
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        # Write both files next to the originals and swap them in atomically
+        tmp_embeddings = self.path / f"{self.EMBEDDINGS_FILE}.tmp"
+        with open(tmp_embeddings, "wb") as f:
+            np.save(f, embeddings)
+        tmp_entries = self.path / f"{self.ENTRIES_FILE}.tmp"
+        with open(tmp_entries, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_embeddings, self.path / self.EMBEDDINGS_FILE)
+        os.replace(tmp_entries, self.path / self.ENTRIES_FILE)
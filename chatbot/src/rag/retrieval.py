@@ -1,7 +1,9 @@
 from typing import Dict, Any
 from .embeddings import EmbeddingService
 from .documents import MarkdownDocumentProcessor
+from .ingest import IngestionPipeline
 from config.settings import settings
+from src.utils.cache import LRUCache, normalize_text
 
 
 class RAGRetriever:
@@ -9,22 +11,131 @@ class RAGRetriever:
         self.logger = logger
         self.embedding_service = EmbeddingService()
         self.document_processor = MarkdownDocumentProcessor()
+        self.context_cache = LRUCache(
+            "retrieval_context",
+            max_entries=settings.retrieval_cache_max_entries,
+            ttl=settings.retrieval_cache_ttl,
+        )
+        self._collection_count = (None, 0)
 
-    def initialize_knowledge_base(self) -> None:
+    def initialize_knowledge_base(self, incremental: bool = False) -> None:
+        try:
+            if incremental:
+                self.sync_knowledge_base()
+            else:
+                self.rebuild_knowledge_base()
+        finally:
+            self.embedding_service.close()
+
+    def rebuild_knowledge_base(self) -> None:
         self.logger.info("Initializing knowledge base...")
 
         # Clear existing collection
         self.embedding_service.clear_collection()
 
-        # Process and embed documents
-        documents = self.document_processor.process_documents()
-        if documents:
-            self.embedding_service.embed_documents(documents)
+        # Stream documents through load -> split -> encode -> store in batches
+        pipeline = IngestionPipeline(self.document_processor, self.embedding_service)
+        stats = pipeline.run()
+        if stats["chunks"]:
+            self.embedding_service.compact_cache(pipeline.live_keys)
         else:
             self.logger.info("No documents found to process")
 
+        self.embedding_service.bump_collection_version()
+        self.context_cache.clear()
+
+    def sync_knowledge_base(self) -> None:
+        """Embed only new or changed chunks and drop chunks of removed files."""
+        self.logger.info("Synchronizing knowledge base...")
+
+        indexed = self.embedding_service.get_indexed_sources()
+        # Files still hashing to their single indexed version are not split
+        known_hashes = {
+            source: next(iter(existing["source_hashes"]))
+            for source, existing in indexed.items()
+            if len(existing["source_hashes"]) == 1
+        }
+
+        to_embed = []
+        to_refresh = []
+        to_delete = []
+        embedded = 0
+        kept = 0
+        unchanged = 0
+        seen_sources = set()
+
+        for document, chunks in self.document_processor.iter_processed(
+            known_hashes=known_hashes
+        ):
+            source = document.metadata["source"]
+            seen_sources.add(source)
+            existing = indexed.get(source, {"ids": [], "source_hashes": set()})
+
+            if chunks is None:
+                unchanged += 1
+                continue
+
+            old_ids = set(existing["ids"])
+            new_ids = set()
+            for chunk in chunks:
+                new_ids.add(chunk.metadata["chunk_id"])
+                if chunk.metadata["chunk_id"] in old_ids:
+                    to_refresh.append(chunk)
+                else:
+                    to_embed.append(chunk)
+            to_delete.extend(old_ids - new_ids)
+
+            # Flush in batches to keep memory bounded on large changes
+            if len(to_embed) >= settings.ingest_batch_size:
+                self.embedding_service.embed_documents(to_embed)
+                embedded += len(to_embed)
+                to_embed = []
+            if len(to_refresh) >= settings.ingest_batch_size:
+                self.embedding_service.update_metadata(to_refresh)
+                kept += len(to_refresh)
+                to_refresh = []
+
+        # A file that failed to load keeps its chunks until it loads again
+        failed = set(self.document_processor.failed_sources)
+        for source, existing in indexed.items():
+            if source not in seen_sources and source not in failed:
+                to_delete.extend(existing["ids"])
+
+        if to_embed:
+            self.embedding_service.embed_documents(to_embed)
+        self.embedding_service.update_metadata(to_refresh)
+        self.embedding_service.delete_documents(to_delete)
+        embedded += len(to_embed)
+        kept += len(to_refresh)
+
+        self.logger.info(
+            f"Knowledge base synchronized: {unchanged} unchanged files, "
+            f"{embedded} chunks embedded, {kept} chunks kept, "
+            f"{len(to_delete)} chunks deleted"
+            + (f", {len(failed)} files failed and were left as indexed" if failed else "")
+        )
+        self.context_cache.clear()
+
+    def _get_collection_count(self, version: str) -> int:
+        cached_version, count = self._collection_count
+        if cached_version != version:
+            count = self.embedding_service.get_collection_count()
+            self._collection_count = (version, count)
+        return count
+
     def retrieve_context(self, query: str) -> str:
-        if self.embedding_service.get_collection_count() == 0:
+        version = self.embedding_service.get_collection_version()
+        cache_key = (normalize_text(query), version)
+        context = self.context_cache.get(cache_key)
+        if context is not None:
+            return context
+
+        context = self._build_context(query, version)
+        self.context_cache.set(cache_key, context)
+        return context
+
+    def _build_context(self, query: str, version: str) -> str:
+        if self._get_collection_count(version) == 0:
             return "No knowledge base available."
 
         results = self.embedding_service.search(query, k=settings.top_k_results)
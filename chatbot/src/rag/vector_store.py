@@ -0,0 +1,531 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+import numpy as np
+
+from config.settings import settings
+
+
+class VectorStore(ABC):
+    """Storage and nearest-neighbour search over document chunk embeddings.
+
+    Distances are cosine distances (1 - cosine similarity), ascending.
+    """
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> None: ...
+
+    @abstractmethod
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None: ...
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None: ...
+
+    @abstractmethod
+    def query(self, embedding: np.ndarray, k: int) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_metadata(self) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Return the ids and metadata of every stored chunk."""
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class ChromaVectorStore(VectorStore):
+    def __init__(self, path: str, collection_name: str = "documents"):
+        self.collection_name = collection_name
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self._get_collection()
+
+    def _get_collection(self):
+        return self.client.get_or_create_collection(
+            name=self.collection_name, metadata={"hnsw:space": "cosine"}
+        )
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        self.collection.upsert(
+            embeddings=np.asarray(embeddings).tolist(),
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids,
+        )
+
+    def update_metadata(self, ids, metadatas) -> None:
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids) -> None:
+        self.collection.delete(ids=ids)
+
+    def query(self, embedding, k) -> List[Dict[str, Any]]:
+        results = self.collection.query(
+            query_embeddings=[np.asarray(embedding).tolist()], n_results=k
+        )
+
+        # Format results
+        formatted_results = []
+        for i in range(len(results["documents"][0])):
+            formatted_results.append(
+                {
+                    "content": results["documents"][0][i],
+                    "metadata": results["metadatas"][0][i],
+                    "distance": results["distances"][0][i],
+                }
+            )
+
+        return formatted_results
+
+    def get_metadata(self):
+        existing = self.collection.get(include=["metadatas"])
+        return existing["ids"], existing["metadatas"]
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def clear(self) -> None:
+        self.client.delete_collection(self.collection_name)
+        self.collection = self._get_collection()
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """One consistent state of a NumpyVectorStore that queries read from."""
+
+    ids: Tuple[Optional[str], ...]
+    documents: Tuple[Optional[str], ...]
+    metadatas: Tuple[Optional[Dict[str, Any]], ...]
+    dead: np.ndarray
+    live: int
+    matrix: Optional[np.memmap]
+    scales: Optional[np.memmap]
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact cosine search over one contiguous memory-mapped matrix.
+
+    Embeddings are L2-normalised and stored as float32, float16 or int8 rows
+    of an append-only file; int8 rows carry a per-vector float32 scale in a
+    parallel file. Texts, metadata and ids live in a JSON index, and every
+    later upsert, metadata update or delete is appended to a JSON-lines log
+    of the same generation, so a write costs what it changes. Updates and
+    deletes leave tombstoned rows that are dropped by compaction into a new
+    file generation with a fresh index, so a reader never sees a
+    half-written matrix. A query is a single matrix-vector product followed
+    by argpartition.
+
+    Writes and reloads build the new state under a lock and publish it as
+    an immutable snapshot in one assignment. A query reads a single
+    snapshot throughout, so it never mixes rows, texts and matrix of
+    different versions. Replaced files stay readable through the old
+    snapshot's memory map until it is dropped.
+
+    A store written with another dtype than the configured one can still be
+    opened and cleared, so that a rebuild can replace it, but querying or
+    writing it fails until then.
+    """
+
+    INDEX_FILE = "index.json"
+    BLOCK_ROWS = 16384
+    DTYPES = ("float32", "float16", "int8")
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.path / self.INDEX_FILE
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported vector store dtype: {dtype}")
+        self.dtype = np.dtype(dtype)
+        self.quantized = self.dtype == np.int8
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self.dim: Optional[int] = None
+        self.generation = 0
+        self.ids: List[Optional[str]] = []
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Optional[Dict[str, Any]]] = []
+        self.row_of: Dict[str, int] = {}
+        # Size of the log entries applied, and the files' state they match
+        self._log_size = 0
+        self._stamp: Tuple = (None, None)
+        # Set while the files on disk use another dtype, with their paths
+        self._dtype_error: Optional[str] = None
+        self._stale_paths: List[Path] = []
+        self._publish()
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.path / f"vectors-{self.generation}.{self.dtype.name}"
+
+    @property
+    def scales_path(self) -> Path:
+        return self.path / f"scales-{self.generation}.f32"
+
+    @property
+    def log_path(self) -> Path:
+        return self.path / f"log-{self.generation}.jsonl"
+
+    def _read_stamp(self) -> Tuple:
+        def stat(path: Path) -> Optional[Tuple[int, int]]:
+            try:
+                result = path.stat()
+            except FileNotFoundError:
+                return None
+            return result.st_mtime_ns, result.st_size
+
+        return stat(self.index_path), stat(self.log_path)
+
+    def _load(self) -> None:
+        if not self.index_path.exists():
+            return
+
+        with open(self.index_path, "r") as f:
+            index = json.load(f)
+
+        stored_dtype = index.get("dtype", self.dtype.name)
+        if stored_dtype != self.dtype.name:
+            self.generation = index["generation"]
+            self._stale_paths = [
+                self.path / f"vectors-{self.generation}.{stored_dtype}",
+                self.scales_path,
+            ]
+            self._dtype_error = (
+                f"Vector store at {self.path} uses {stored_dtype} but "
+                f"{self.dtype.name} is configured; rebuild the knowledge base"
+            )
+            self._stamp = self._read_stamp()
+            return
+
+        self.dim = index["dim"]
+        self.generation = index["generation"]
+        self.ids = index["ids"]
+        self.documents = index["documents"]
+        self.metadatas = index["metadatas"]
+        self.row_of = {id_: row for row, id_ in enumerate(self.ids) if id_ is not None}
+        self._replay_log()
+        self._stamp = self._read_stamp()
+        self._publish()
+
+    def _replay_log(self) -> None:
+        try:
+            with open(self.log_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        for line in data.splitlines(keepends=True):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # torn tail of an interrupted write
+            if not line.endswith(b"\n"):
+                break
+            self._apply(record)
+            self._log_size += len(line)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        id_ = record["id"]
+        if record["op"] == "add":
+            self._tombstone(id_)
+            self.row_of[id_] = len(self.ids)
+            self.ids.append(id_)
+            self.documents.append(record["document"])
+            self.metadatas.append(record["metadata"])
+        elif record["op"] == "delete":
+            self._tombstone(id_)
+        elif record["op"] == "metadata":
+            row = self.row_of.get(id_)
+            if row is not None:
+                self.metadatas[row] = record["metadata"]
+
+    def _write_log(self, records: List[Dict[str, Any]]) -> None:
+        """Apply records, append them to the log and publish the result."""
+        for record in records:
+            self._apply(record)
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with open(self.log_path, "ab") as f:
+            # Drop a torn tail left by an interrupted write
+            f.truncate(self._log_size)
+            f.write(data)
+        self._log_size += len(data)
+        self._stamp = self._read_stamp()
+        self._publish()
+
+    def _reload_if_changed(self) -> None:
+        # Another process (--init-kb) may have rewritten the store
+        stamp = self._read_stamp()
+        if stamp[0] is not None and stamp != self._stamp:
+            self._reset()
+            self._load()
+
+    def _current(self) -> _Snapshot:
+        with self._lock:
+            self._reload_if_changed()
+            self._check_dtype()
+            return self._snapshot
+
+    def _check_dtype(self) -> None:
+        if self._dtype_error is not None:
+            raise ValueError(self._dtype_error)
+
+    def _save(self) -> None:
+        """Write the whole index, which starts an empty log."""
+        index = {
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+            "generation": self.generation,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+        }
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        self.log_path.unlink(missing_ok=True)
+        self._log_size = 0
+        self._stamp = self._read_stamp()
+        self._publish()
+
+    def _publish(self) -> None:
+        """Replace the snapshot read by queries with the current state."""
+        matrix = scales = None
+        if self.ids and self.dim:
+            matrix = np.memmap(
+                self.vectors_path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(len(self.ids), self.dim),
+            )
+            if self.quantized:
+                scales = np.memmap(
+                    self.scales_path, dtype=np.float32, mode="r", shape=(len(self.ids),)
+                )
+        self._snapshot = _Snapshot(
+            ids=tuple(self.ids),
+            documents=tuple(self.documents),
+            metadatas=tuple(self.metadatas),
+            dead=np.array([id_ is None for id_ in self.ids], dtype=bool),
+            live=len(self.row_of),
+            matrix=matrix,
+            scales=scales,
+        )
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Convert normalised float32 rows to the storage dtype."""
+        if not self.quantized:
+            return vectors.astype(self.dtype), None
+
+        # Symmetric per-vector scale so the largest component maps to 127
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales = np.maximum(scales, 1e-12).astype(np.float32)
+        rows = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return rows, scales
+
+    def _append(self, vectors_file, scales_file, rows, scales) -> None:
+        vectors_file.write(np.ascontiguousarray(rows).tobytes())
+        if scales_file is not None:
+            scales_file.write(np.ascontiguousarray(scales, np.float32).tobytes())
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        if not ids:
+            return
+
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            self._check_dtype()
+            if self.dim is None or not self.index_path.exists():
+                # The log only extends an index that records the dimension
+                self.dim = self.dim or int(vectors.shape[1])
+                self._save()
+
+            rows, scales = self._quantize(vectors)
+            row_count = len(self.ids)
+            with open(self.vectors_path, "ab") as f:
+                # Rows written by an interrupted upsert never reached the log
+                f.truncate(row_count * self.dim * self.dtype.itemsize)
+                if self.quantized:
+                    with open(self.scales_path, "ab") as scales_file:
+                        scales_file.truncate(row_count * 4)
+                        self._append(f, scales_file, rows, scales)
+                else:
+                    self._append(f, None, rows, scales)
+
+            self._write_log(
+                [
+                    {"op": "add", "id": id_, "document": document, "metadata": metadata}
+                    for id_, document, metadata in zip(ids, documents, metadatas)
+                ]
+            )
+            self._maybe_compact()
+
+    def update_metadata(self, ids, metadatas) -> None:
+        with self._lock:
+            self._check_dtype()
+            self._write_log(
+                [
+                    {"op": "metadata", "id": id_, "metadata": metadata}
+                    for id_, metadata in zip(ids, metadatas)
+                    if id_ in self.row_of
+                ]
+            )
+
+    def delete(self, ids) -> None:
+        with self._lock:
+            self._check_dtype()
+            self._write_log(
+                [{"op": "delete", "id": id_} for id_ in ids if id_ in self.row_of]
+            )
+            self._maybe_compact()
+
+    def _tombstone(self, id_: str) -> None:
+        row = self.row_of.pop(id_, None)
+        if row is not None:
+            self.ids[row] = None
+            self.documents[row] = None
+            self.metadatas[row] = None
+
+    def _maybe_compact(self) -> None:
+        dead = len(self.ids) - len(self.row_of)
+        if dead > 1024 and dead > len(self.ids) // 2:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the store without tombstoned rows into a new generation."""
+        with self._lock:
+            self._check_dtype()
+            matrix = self._snapshot.matrix
+            scales = self._snapshot.scales
+            live_rows = [row for row, id_ in enumerate(self.ids) if id_ is not None]
+            old_paths = [self.vectors_path, self.scales_path, self.log_path]
+
+            self.generation += 1
+            with open(self.vectors_path, "wb") as f:
+                scales_file = open(self.scales_path, "wb") if self.quantized else None
+                try:
+                    for start in range(0, len(live_rows), self.BLOCK_ROWS):
+                        rows = live_rows[start : start + self.BLOCK_ROWS]
+                        self._append(
+                            f,
+                            scales_file,
+                            np.asarray(matrix[rows]),
+                            np.asarray(scales[rows]) if self.quantized else None,
+                        )
+                finally:
+                    if scales_file is not None:
+                        scales_file.close()
+
+            self.ids = [self.ids[row] for row in live_rows]
+            self.documents = [self.documents[row] for row in live_rows]
+            self.metadatas = [self.metadatas[row] for row in live_rows]
+            self.row_of = {id_: row for row, id_ in enumerate(self.ids)}
+            self._save()
+            for old_path in old_paths:
+                old_path.unlink(missing_ok=True)
+
+    def scores(self, embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every row."""
+        return self._scores(self._current(), embedding)
+
+    def _scores(self, snapshot: _Snapshot, embedding: np.ndarray) -> np.ndarray:
+        query = self._normalize(embedding)
+        rows = len(snapshot.ids)
+        scores = np.empty(rows, dtype=np.float32)
+        for start in range(0, rows, self.BLOCK_ROWS):
+            block = np.asarray(
+                snapshot.matrix[start : start + self.BLOCK_ROWS], np.float32
+            )
+            block_scores = block @ query
+            if self.quantized:
+                block_scores *= snapshot.scales[start : start + len(block)]
+            scores[start : start + len(block)] = block_scores
+        scores[snapshot.dead] = -np.inf
+        return scores
+
+    def query(self, embedding, k) -> List[Dict[str, Any]]:
+        snapshot = self._current()
+        if snapshot.live == 0:
+            return []
+
+        k = min(k, snapshot.live)
+        scores = self._scores(snapshot, embedding)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "content": snapshot.documents[row],
+                "metadata": snapshot.metadatas[row],
+                "distance": float(1.0 - scores[row]),
+            }
+            for row in top
+        ]
+
+    def get_metadata(self):
+        snapshot = self._current()
+        live_rows = [row for row, id_ in enumerate(snapshot.ids) if id_ is not None]
+        return (
+            [snapshot.ids[r] for r in live_rows],
+            [snapshot.metadatas[r] for r in live_rows],
+        )
+
+    def count(self) -> int:
+        return self._current().live
+
+    def clear(self) -> None:
+        with self._lock:
+            old_paths = [self.vectors_path, self.scales_path, self.log_path]
+            old_paths += self._stale_paths
+            generation = self.generation
+            self._reset()
+            self.generation = generation + 1
+            self.vectors_path.touch()
+            if self.quantized:
+                self.scales_path.touch()
+            self._save()
+            for old_path in old_paths:
+                old_path.unlink(missing_ok=True)
+
+    def memory_bytes(self) -> int:
+        """Size of the stored vectors (and scales) for the current rows."""
+        row_bytes = (self.dim or 0) * self.dtype.itemsize
+        if self.quantized:
+            row_bytes += 4
+        return len(self.ids) * row_bytes
+
+
+def create_vector_store(backend: Optional[str] = None) -> VectorStore:
+    """Create the vector store configured by VECTOR_STORE_BACKEND."""
+    backend = backend or settings.vector_store_backend
+    if backend == "chroma":
+        return ChromaVectorStore(settings.vector_db_path)
+    elif backend == "numpy":
+        return NumpyVectorStore(
+            str(Path(settings.vector_db_path) / "numpy"),
+            dtype=settings.vector_store_dtype,
+        )
+    else:
+        raise ValueError(f"Unsupported vector store backend: {backend}")
@@ -0,0 +1,325 @@
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from config.settings import settings
+from src.utils.metrics import runtime_metrics
+
+PASS = "pass"
+FAIL = "fail"
+INCONCLUSIVE = "inconclusive"
+
+# The judge prompt's backdoor (see UnusualPrompt.get_llm_response)
+BACKDOOR_TRIGGER = "TouchYerSpaget"
+
+# Characters before a new chunk that are searched again for deny-list
+# matches split across chunks
+STREAM_OVERLAP = 200
+
+
+def sliding_windows(text: str, size: int, stride: int) -> List[str]:
+    """Overlapping character windows covering all of text."""
+    if len(text) <= size:
+        return [text]
+    # The last window is aligned to the end of the text
+    starts = list(range(0, len(text) - size, stride)) + [len(text) - size]
+    return [text[start : start + size] for start in starts]
+
+
+def windowed_scorer(
+    predict: Callable[[List[str]], List[float]], size: int, stride: int
+) -> Callable[[List[str]], List[float]]:
+    """Wrap a batch classifier so long texts are scored window by window.
+
+    All windows of all texts go through predict in a single call, and each
+    text gets the highest score of its windows, so an attack hidden at the
+    end of a long input is not cut off by the model's input limit.
+    """
+
+    def score(texts: List[str]) -> List[float]:
+        windows = [sliding_windows(text, size, stride) for text in texts]
+        scores = iter(predict([window for group in windows for window in group]))
+        return [max(float(next(scores)) for _ in group) for group in windows]
+
+    return score
+
+
+@dataclass
+class CascadeResult:
+    """Outcome of one cascade run."""
+
+    passed: bool
+    stage: Optional[str]
+    reason: str
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class CascadeStage(ABC):
+    """One check of the cascade.
+
+    A stage either decides (pass or fail), which ends the cascade, or
+    returns inconclusive to hand the input on to the next, more expensive
+    stage.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def check(self, text: str) -> Tuple[str, str]:
+        """Return the verdict and a short reason."""
+
+    def check_stream(self, text: str, new_from: int) -> Tuple[str, str]:
+        """Check text that grew by text[new_from:] since the last call."""
+        return self.check(text)
+
+
+class LengthStage(CascadeStage):
+    def __init__(self, name: str, min_length: int, max_length: int):
+        super().__init__(name)
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def check(self, text: str) -> Tuple[str, str]:
+        if len(text) < self.min_length:
+            return FAIL, f"shorter than {self.min_length} characters"
+        if len(text) > self.max_length:
+            return FAIL, f"longer than {self.max_length} characters"
+        return INCONCLUSIVE, "length ok"
+
+
+class DenyListStage(CascadeStage):
+    """Keyword and regex deny-lists, compiled into one pattern per list."""
+
+    def __init__(
+        self, name: str, deny_lists: List[Dict[str, Any]], honor_backdoor: bool = True
+    ):
+        super().__init__(name)
+        self.honor_backdoor = honor_backdoor
+        self.patterns = []
+        for deny_list in deny_lists:
+            alternatives = [
+                rf"\b{re.escape(keyword)}\b" for keyword in deny_list.get("keywords", [])
+            ] + list(deny_list.get("patterns", []))
+            if alternatives:
+                self.patterns.append(
+                    (
+                        deny_list.get("name", "deny_list"),
+                        re.compile("|".join(f"(?:{a})" for a in alternatives), re.I),
+                    )
+                )
+
+    def check(self, text: str) -> Tuple[str, str]:
+        # The deny rules restate the judge prompt, so the judge's backdoor
+        # applies to them as well
+        if self.honor_backdoor and settings.llm_backdoored and BACKDOOR_TRIGGER in text:
+            return INCONCLUSIVE, "deny-lists skipped"
+        return self._search(text)
+
+    def check_stream(self, text: str, new_from: int) -> Tuple[str, str]:
+        return self._search(text[max(0, new_from - STREAM_OVERLAP) :])
+
+    def _search(self, text: str) -> Tuple[str, str]:
+        for name, pattern in self.patterns:
+            match = pattern.search(text)
+            if match:
+                return FAIL, f"matched deny-list {name}: {match.group(0)!r}"
+        return INCONCLUSIVE, "no deny-list match"
+
+
+class LocalModelStage(CascadeStage):
+    """A local classifier that is trusted only when it is confident.
+
+    Inputs scoring at least fail_above fail and inputs below pass_below pass
+    without asking the judge. Scores come from `scorer` if given, e.g. a
+    MicroBatcher shared by concurrent requests, else from the validator.
+    Validators that do not expose scores can only fail an input; their
+    passes are left to the next stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        validator: Any,
+        fail_above: float,
+        pass_below: float,
+        scorer: Optional[Callable[[str], float]] = None,
+    ):
+        super().__init__(name)
+        self.validator = validator
+        self.fail_above = fail_above
+        self.pass_below = pass_below
+        if scorer is None and hasattr(validator, "predict_jailbreak"):
+            scorer = lambda text: validator.predict_jailbreak([text])[0]  # noqa: E731
+        self.scorer = scorer
+
+    def check(self, text: str) -> Tuple[str, str]:
+        if self.scorer is not None:
+            score = float(self.scorer(text))
+            if score >= self.fail_above:
+                return FAIL, f"score {score:.3f}"
+            if score < self.pass_below:
+                return PASS, f"score {score:.3f}"
+            return INCONCLUSIVE, f"score {score:.3f}"
+
+        result = self.validator.validate(text, {})
+        if result.outcome == "fail":
+            return FAIL, getattr(result, "error_message", "") or "failed"
+        return INCONCLUSIVE, "passed"
+
+
+class ValidatorStage(CascadeStage):
+    """Any guardrails validator whose verdict is final, e.g. the LLM judge."""
+
+    def __init__(self, name: str, validator: Any):
+        super().__init__(name)
+        self.validator = validator
+
+    def check(self, text: str) -> Tuple[str, str]:
+        result = self.validator.validate(text, {})
+        if result.outcome == "fail":
+            return FAIL, getattr(result, "error_message", "") or "failed"
+        return PASS, "passed"
+
+
+class ValidatorCascade:
+    """Run stages cheapest first and stop at the first decisive verdict.
+
+    An entry of `stages` may itself be a list of independent stages, which
+    then run concurrently on a thread pool. The first failure in such a
+    group decides at once: stages that have not started are cancelled and
+    running ones are no longer waited for. Pass verdicts inside a group are
+    not decisive, since whichever stage finished first would win, so a
+    group passes once all of its stages have finished without failing.
+
+    Inputs that no stage decides on pass. A stage that raises fails the
+    input, as the guardrails Guard does. Per-stage latency and outcome
+    counts are recorded in runtime_metrics under "guard.cascade.<stage>.*".
+    """
+
+    def __init__(
+        self,
+        stages: List[Union[CascadeStage, List[CascadeStage]]],
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        self.stages = stages
+        self._executor = executor
+        if executor is None and any(isinstance(stage, list) for stage in stages):
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.pipeline_workers, thread_name_prefix="guard"
+            )
+
+    def validate(self, text: str) -> CascadeResult:
+        timings: Dict[str, float] = {}
+        for stage in self.stages:
+            if isinstance(stage, list):
+                result = self._run_group(stage, text, timings)
+                if result is not None:
+                    return result
+                continue
+
+            verdict, reason, timings[stage.name] = self._run_stage(stage, text)
+            if verdict != INCONCLUSIVE:
+                runtime_metrics.increment(
+                    f"guard.cascade.{stage.name}.short_circuit_{verdict}"
+                )
+                return CascadeResult(verdict == PASS, stage.name, reason, timings)
+
+        runtime_metrics.increment("guard.cascade.undecided")
+        return CascadeResult(True, None, "no stage objected", timings)
+
+    def _run_stage(self, stage: CascadeStage, text: str) -> Tuple[str, str, float]:
+        start = time.perf_counter()
+        try:
+            verdict, reason = stage.check(text)
+        except Exception as e:
+            verdict, reason = FAIL, f"error: {e}"
+            runtime_metrics.increment(f"guard.cascade.{stage.name}.errors")
+        elapsed = time.perf_counter() - start
+        runtime_metrics.observe(f"guard.cascade.{stage.name}.latency", elapsed)
+        if verdict == INCONCLUSIVE:
+            runtime_metrics.increment(f"guard.cascade.{stage.name}.inconclusive")
+        return verdict, reason, elapsed
+
+    def _run_group(
+        self, group: List[CascadeStage], text: str, timings: Dict[str, float]
+    ) -> Optional[CascadeResult]:
+        futures = {
+            self._executor.submit(self._run_stage, stage, text): stage
+            for stage in group
+        }
+        for future in as_completed(futures):
+            stage = futures[future]
+            verdict, reason, timings[stage.name] = future.result()
+            if verdict == FAIL:
+                runtime_metrics.increment(f"guard.cascade.{stage.name}.short_circuit_fail")
+                for other, other_stage in futures.items():
+                    if not other.done():
+                        other.cancel()
+                        runtime_metrics.increment(
+                            f"guard.cascade.{other_stage.name}.abandoned"
+                        )
+                return CascadeResult(False, stage.name, reason, timings)
+        return None
+
+    def _flat_stages(self) -> List[CascadeStage]:
+        flat = []
+        for stage in self.stages:
+            flat.extend(stage if isinstance(stage, list) else [stage])
+        return flat
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Latency and short-circuit counts of every stage."""
+        snapshot = runtime_metrics.snapshot()
+        stats = {}
+        for stage in self._flat_stages():
+            prefix = f"guard.cascade.{stage.name}"
+            latency = snapshot["histograms"].get(f"{prefix}.latency", {})
+            stats[stage.name] = {
+                "runs": latency.get("count", 0),
+                "mean_latency": latency.get("mean", 0.0),
+                "p95_latency": latency.get("p95", 0.0),
+                "short_circuit_pass": snapshot["counters"].get(
+                    f"{prefix}.short_circuit_pass", 0
+                ),
+                "short_circuit_fail": snapshot["counters"].get(
+                    f"{prefix}.short_circuit_fail", 0
+                ),
+                "inconclusive": snapshot["counters"].get(f"{prefix}.inconclusive", 0),
+                "abandoned": snapshot["counters"].get(f"{prefix}.abandoned", 0),
+                "errors": snapshot["counters"].get(f"{prefix}.errors", 0),
+            }
+        return stats
+
+
+class StreamMonitor:
+    """Run cheap stages on a text while it is being streamed.
+
+    Every chunk is checked as soon as it arrives so that a response that is
+    going to be rejected can be cut off early. Stages only see the new part
+    of the text where possible (see CascadeStage.check_stream). The first
+    failing stage is remembered and returned for every later chunk.
+    """
+
+    def __init__(self, stages: List[CascadeStage]):
+        self.stages = stages
+        self.text = ""
+        self.result: Optional[CascadeResult] = None
+
+    def feed(self, chunk: str) -> Optional[CascadeResult]:
+        """Add a chunk and return the failure, if any stage has failed."""
+        if self.result is not None:
+            return self.result
+
+        new_from = len(self.text)
+        self.text += chunk
+        for stage in self.stages:
+            verdict, reason = stage.check_stream(self.text, new_from)
+            if verdict == FAIL:
+                runtime_metrics.increment(f"guard.stream.{stage.name}.aborted")
+                self.result = CascadeResult(False, stage.name, reason)
+                break
+        return self.result
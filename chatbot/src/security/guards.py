@@ -1,8 +1,28 @@
+import os
+import signal
+import threading
+import weakref
 import yaml
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 from config.settings import settings
 from src.utils.guardrails_setup import setup_guardrails_config, is_guardrails_configured
+from src.utils.batching import MicroBatcher
 from src.utils.llm_logger import llm_logger
+from src.utils.metrics import runtime_metrics
+from .cascade import (
+    FAIL,
+    CascadeResult,
+    CascadeStage,
+    DenyListStage,
+    LengthStage,
+    LocalModelStage,
+    StreamMonitor,
+    ValidatorCascade,
+    ValidatorStage,
+    windowed_scorer,
+)
 
 try:
     from guardrails import Guard
@@ -18,13 +38,73 @@ except ImportError:
     GUARDRAILS_AVAILABLE = False
 
 
+# Config sections the input and output side are built from
+INPUT_SECTIONS = ("guards", "input_validation", "cascade")
+OUTPUT_SECTIONS = ("output_validation",)
+
+_reloadable: "weakref.WeakSet[SecurityGuards]" = weakref.WeakSet()
+
+
+def _request_reload(signum, frame) -> None:
+    for guards in list(_reloadable):
+        guards.request_reload()
+
+
+@dataclass
+class GuardSet:
+    """Everything built from one version of the guard config.
+
+    Requests take the current set once and use it throughout, so a reload
+    swapping in a new set never mixes old and new guards in one request.
+    """
+
+    config: Dict[str, Any]
+    input_cascade: Optional[ValidatorCascade]
+    input_guard: Any
+    output_stages: List[CascadeStage]
+    output_guard: Any
+
+
 class SecurityGuards:
     def __init__(self, logger):
         self.logger = logger
-        self.config = self._load_config()
         self.guardrails_enabled = self._setup_guardrails()
-        self.input_guard = self._create_input_guard()
-        self.output_guard = self._create_output_guard()
+        self.batchers: Dict[str, MicroBatcher] = {}
+        self._batched_validators: Dict[str, Any] = {}
+        # Validators by construction options, kept across reloads so that
+        # their models are only loaded once
+        self._validators: Dict[Tuple[str, str, bool], Any] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.pipeline_workers, thread_name_prefix="guard"
+        )
+        self._reload_lock = threading.Lock()
+        self._reload_requested = threading.Event()
+        self.config_stamp = self._config_stamp()
+        self.guard_set = self._build_guard_set(self._load_config())
+        if settings.guardrails_hot_reload:
+            self._start_reloader()
+
+    # The current guard set's parts, for callers that do not validate
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.guard_set.config
+
+    @property
+    def input_cascade(self) -> Optional[ValidatorCascade]:
+        return self.guard_set.input_cascade
+
+    @property
+    def input_guard(self) -> Any:
+        return self.guard_set.input_guard
+
+    @property
+    def output_stages(self) -> List[CascadeStage]:
+        return self.guard_set.output_stages
+
+    @property
+    def output_guard(self) -> Any:
+        return self.guard_set.output_guard
 
     def _setup_guardrails(self) -> bool:
         """Set up Guardrails configuration and check if it's available."""
@@ -53,6 +133,128 @@ class SecurityGuards:
             )
             return self._default_config()
 
+    def _config_stamp(self) -> Optional[Tuple[float, int]]:
+        """Modification time and size of the config file, None if missing."""
+        try:
+            stat = os.stat(settings.guardrails_config)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _check_config(self, config: Any) -> None:
+        """Refuse a config whose sections do not have the expected types."""
+        if not isinstance(config, dict):
+            raise ValueError("the config is not a mapping")
+        guards = config.get("guards", [])
+        if not isinstance(guards, list) or not all(
+            isinstance(guard, dict) for guard in guards
+        ):
+            raise ValueError("guards must be a list of mappings")
+        for section in INPUT_SECTIONS + OUTPUT_SECTIONS:
+            if section != "guards" and not isinstance(config.get(section, {}), dict):
+                raise ValueError(f"{section} must be a mapping")
+
+    def _build_guard_set(
+        self, config: Dict[str, Any], previous: Optional[GuardSet] = None
+    ) -> GuardSet:
+        """Build guards for config, reusing the parts of previous it shares."""
+
+        def changed(sections: Tuple[str, ...]) -> bool:
+            return previous is None or any(
+                config.get(section) != previous.config.get(section)
+                for section in sections
+            )
+
+        if changed(INPUT_SECTIONS):
+            input_cascade = self._create_input_cascade(config)
+            # The cascade runs the same validators, don't load them twice
+            input_guard = None if input_cascade else self._create_input_guard(config)
+        else:
+            input_cascade, input_guard = previous.input_cascade, previous.input_guard
+
+        if changed(OUTPUT_SECTIONS):
+            output_stages = self._create_output_stages(config)
+            output_guard = self._create_output_guard(config)
+        else:
+            output_stages, output_guard = previous.output_stages, previous.output_guard
+
+        return GuardSet(config, input_cascade, input_guard, output_stages, output_guard)
+
+    def reload(self) -> bool:
+        """Re-read the guard config and swap in guards rebuilt from it.
+
+        Only the side (input or output) whose sections changed is rebuilt,
+        and validators are reused while their construction options stay the
+        same, so no model is loaded twice. A config that fails to parse,
+        has sections of the wrong type or fails to build leaves the current
+        guards in place.
+
+        Returns:
+            bool: Whether new guards were swapped in.
+        """
+        with self._reload_lock:
+            self.config_stamp = self._config_stamp()
+            try:
+                config = self._load_config()
+                if config == self.guard_set.config:
+                    return False
+                self._check_config(config)
+                guard_set = self._build_guard_set(config, previous=self.guard_set)
+            except Exception as e:
+                runtime_metrics.increment("guard.reload.errors")
+                self.logger.error(
+                    f"Keeping current guards, reloading {settings.guardrails_config} "
+                    f"failed: {e}"
+                )
+                return False
+
+            self.guard_set = guard_set
+            runtime_metrics.increment("guard.reload.applied")
+            self.logger.info(f"Reloaded guard config {settings.guardrails_config}")
+            return True
+
+    def request_reload(self) -> None:
+        """Ask the reloader thread to reload, e.g. from a signal handler."""
+        self._reload_requested.set()
+
+    def _start_reloader(self) -> None:
+        _reloadable.add(self)
+        # Signal handlers can only be installed from the main thread
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, _request_reload)
+        threading.Thread(
+            target=self._watch_config, name="guard-reload", daemon=True
+        ).start()
+
+    def _watch_config(self) -> None:
+        # Reloads run here rather than in the signal handler, so loading a
+        # newly enabled model never blocks the main thread. A changed file
+        # is only reloaded once its mtime and size are the same on two
+        # polls in a row, so a file still being written is not picked up.
+        interval = settings.guardrails_reload_interval or None
+        seen = self.config_stamp
+        while True:
+            requested = self._reload_requested.wait(timeout=interval)
+            self._reload_requested.clear()
+            seen = self._poll_config(seen, requested)
+
+    def _poll_config(self, seen: Any, requested: bool = False) -> Any:
+        """One reloader check; seen is the file stamp of the previous one."""
+        stamp = self._config_stamp()
+        if requested or (stamp != self.config_stamp and stamp == seen):
+            self.reload()
+        return stamp
+
+    def _get_validator(self, guard_type: str, on_fail: str, use_local: bool) -> Any:
+        key = (guard_type, on_fail, use_local)
+        if key not in self._validators:
+            if guard_type == "detect_jailbreak":
+                validator = DetectJailbreak(on_fail=on_fail, use_local=use_local)
+            else:
+                validator = UnusualPrompt(on_fail=on_fail, use_local=use_local)
+            self._validators[key] = validator
+        return self._validators[key]
+
     def _default_config(self) -> Dict[str, Any]:
         return {
             "guards": [
@@ -71,16 +273,21 @@ class SecurityGuards:
             ],
             "input_validation": {"max_length": 2000, "min_length": 1},
             "output_validation": {"max_length": 4000, "check_relevance": True},
+            "cascade": {
+                "enabled": True,
+                "parallel": False,
+                "deny_lists": [{"name": "kouvosto", "keywords": ["Kouvosto"]}],
+            },
         }
 
-    def _create_input_guard(self):
+    def _create_input_guard(self, config: Dict[str, Any]):
         if not self.guardrails_enabled:
             return None
 
         validators = []
 
         # Length validation
-        input_config = self.config.get("input_validation", {})
+        input_config = config.get("input_validation", {})
         validators.append(
             ValidLength(
                 min=input_config.get("min_length", 1),
@@ -90,7 +297,7 @@ class SecurityGuards:
         )
 
         # Add enabled guards
-        for guard_config in self.config.get("guards", []):
+        for guard_config in config.get("guards", []):
             if not guard_config.get("enabled", True):
                 continue
 
@@ -98,22 +305,133 @@ class SecurityGuards:
             on_fail = guard_config.get("on_fail", "filter")
             use_local = guard_config.get("use_local", True)
 
-            if guard_type == "prompt_injection":
-                pass
-                validators.append(UnusualPrompt(on_fail=on_fail, use_local=use_local))
-            elif guard_type == "detect_jailbreak":
-                validators.append(DetectJailbreak(on_fail=on_fail, use_local=use_local))
+            if guard_type in ("prompt_injection", "detect_jailbreak"):
+                validators.append(self._get_validator(guard_type, on_fail, use_local))
 
         return Guard.from_string(validators=validators)
 
-    def _create_output_guard(self):
+    def _create_input_cascade(
+        self, config: Dict[str, Any]
+    ) -> Optional[ValidatorCascade]:
+        """Build the cheap-first cascade that replaces input_guard if enabled.
+
+        Length and deny-list checks run first, then local models, and the LLM
+        judge last, so it is only asked about inputs that nothing cheaper
+        could decide. With cascade.parallel the local models and the judge
+        run concurrently instead, trading judge calls for latency. The
+        deterministic stages work without Guardrails.
+        """
+        cascade_config = config.get("cascade", {})
+        if not cascade_config.get("enabled", False):
+            return None
+
+        input_config = config.get("input_validation", {})
+        stages = [
+            LengthStage(
+                "length",
+                min_length=input_config.get("min_length", 1),
+                max_length=input_config.get("max_length", 2000),
+            ),
+            DenyListStage("deny_list", cascade_config.get("deny_lists", [])),
+        ]
+
+        if self.guardrails_enabled:
+            local_models = []
+            judges = []
+            for guard_config in config.get("guards", []):
+                if not guard_config.get("enabled", True):
+                    continue
+
+                guard_type = guard_config.get("type")
+                name = guard_config.get("name", guard_type)
+                on_fail = guard_config.get("on_fail", "filter")
+                use_local = guard_config.get("use_local", True)
+
+                if guard_type == "detect_jailbreak":
+                    validator = self._get_validator(guard_type, on_fail, use_local)
+                    local_models.append(
+                        LocalModelStage(
+                            name,
+                            validator,
+                            fail_above=guard_config.get(
+                                "fail_above", getattr(validator, "threshold", 0.9)
+                            ),
+                            pass_below=guard_config.get("pass_below", 0.0),
+                            scorer=self._create_batcher(name, validator),
+                        )
+                    )
+                elif guard_type == "prompt_injection":
+                    judges.append(
+                        ValidatorStage(
+                            name, self._get_validator(guard_type, on_fail, use_local)
+                        )
+                    )
+            if cascade_config.get("parallel", False) and len(local_models + judges) > 1:
+                stages.append(local_models + judges)
+            else:
+                stages.extend(local_models + judges)
+
+        self.logger.info(
+            "Input validation cascade: "
+            + " -> ".join(
+                " | ".join(s.name for s in stage) if isinstance(stage, list) else stage.name
+                for stage in stages
+            )
+        )
+        return ValidatorCascade(stages, executor=self._executor)
+
+    def _create_batcher(self, name: str, validator: Any) -> Optional[MicroBatcher]:
+        """Share one batched forward pass between concurrent requests.
+
+        Local model scoring is queued for up to JAILBREAK_BATCH_MAX_WAIT
+        seconds or JAILBREAK_BATCH_MAX_SIZE inputs. Long inputs are split into
+        overlapping windows that are scored in the same batch.
+        """
+        if not settings.jailbreak_batching or not hasattr(validator, "predict_jailbreak"):
+            return None
+
+        # A reload that keeps the model keeps its queue as well
+        if self._batched_validators.get(name) is validator:
+            return self.batchers[name]
+
+        batcher = MicroBatcher(
+            name,
+            windowed_scorer(
+                validator.predict_jailbreak,
+                size=settings.jailbreak_window_size,
+                stride=settings.jailbreak_window_stride,
+            ),
+            max_batch_size=settings.jailbreak_batch_max_size,
+            max_wait=settings.jailbreak_batch_max_wait,
+        )
+        self.batchers[name] = batcher
+        self._batched_validators[name] = validator
+        return batcher
+
+    def _create_output_stages(self, config: Dict[str, Any]) -> List[CascadeStage]:
+        """Cheap output checks that also work on a stream, see StreamMonitor.
+
+        They run without Guardrails and before the output guard.
+        """
+        output_config = config.get("output_validation", {})
+        return [
+            LengthStage(
+                "length", min_length=0, max_length=output_config.get("max_length", 4000)
+            ),
+            # Backdoored inputs must not unlock the output deny-lists
+            DenyListStage(
+                "deny_list", output_config.get("deny_lists", []), honor_backdoor=False
+            ),
+        ]
+
+    def _create_output_guard(self, config: Dict[str, Any]):
         if not self.guardrails_enabled:
             return None
 
         validators = []
 
         # Length validation for output
-        output_config = self.config.get("output_validation", {})
+        output_config = config.get("output_validation", {})
         validators.append(
             ValidLength(max=output_config.get("max_length", 4000), on_fail="reask")
         )
@@ -126,11 +444,15 @@ class SecurityGuards:
         return Guard.from_string(validators=validators)
 
     def validate_input(self, user_input: str) -> Optional[str]:
-        if not self.guardrails_enabled or not self.input_guard:
+        guard_set = self.guard_set
+        if guard_set.input_cascade is not None:
+            return self._validate_input_cascade(guard_set.input_cascade, user_input)
+
+        if not self.guardrails_enabled or not guard_set.input_guard:
             return user_input  # Pass through if guardrails disabled
 
         try:
-            result = self.input_guard.parse(user_input)
+            result = guard_set.input_guard.parse(user_input)
 
             # Log successful validation
             llm_logger.log_validation_event(
@@ -169,12 +491,96 @@ class SecurityGuards:
 
             return None
 
+    def _validate_input_cascade(
+        self, cascade: ValidatorCascade, user_input: str
+    ) -> Optional[str]:
+        result = cascade.validate(user_input)
+        details = {
+            "guard_type": "input",
+            "engine": "cascade",
+            "decided_by": result.stage,
+            "reason": result.reason,
+            "stage_timings": result.timings,
+        }
+
+        if result.passed:
+            llm_logger.log_validation_event(
+                validator_name="input_guard",
+                validation_type="input_validation",
+                input_text=user_input,
+                result="passed",
+                threshold_met=True,
+                details=details,
+            )
+            return user_input
+
+        self.logger.info(f"Input validation failed at {result.stage}: {result.reason}")
+        llm_logger.log_failed_validation(
+            validator_name="input_guard",
+            input_text=user_input,
+            failure_reason=f"{result.stage}: {result.reason}",
+        )
+        llm_logger.log_validation_event(
+            validator_name="input_guard",
+            validation_type="input_validation",
+            input_text=user_input,
+            result="failed",
+            threshold_met=False,
+            details=details,
+        )
+        return None
+
+    def cascade_stats(self) -> Dict[str, Any]:
+        cascade = self.input_cascade
+        if cascade is None:
+            return {}
+        return cascade.stats()
+
+    def batching_stats(self) -> Dict[str, Any]:
+        return {name: batcher.stats() for name, batcher in self.batchers.items()}
+
+    def create_output_monitor(self) -> StreamMonitor:
+        """Incremental output checks for one streamed response."""
+        return StreamMonitor(self.output_stages)
+
+    def log_output_failure(
+        self, output: str, result: CascadeResult, engine: str
+    ) -> None:
+        self.logger.info(f"Output validation failed at {result.stage}: {result.reason}")
+        llm_logger.log_failed_validation(
+            validator_name="output_guard",
+            input_text=output,
+            failure_reason=f"{result.stage}: {result.reason}",
+        )
+        llm_logger.log_validation_event(
+            validator_name="output_guard",
+            validation_type="output_validation",
+            input_text=output,
+            result="failed",
+            threshold_met=False,
+            details={
+                "guard_type": "output",
+                "engine": engine,
+                "decided_by": result.stage,
+                "reason": result.reason,
+            },
+        )
+
     def validate_output(self, output: str) -> Optional[str]:
-        if not self.guardrails_enabled or not self.output_guard:
+        guard_set = self.guard_set
+        for stage in guard_set.output_stages:
+            verdict, reason = stage.check(output)
+            if verdict == FAIL:
+                self.log_output_failure(
+                    output, CascadeResult(False, stage.name, reason), engine="stages"
+                )
+                return None
+
+        if not self.guardrails_enabled or not guard_set.output_guard:
             return output  # Pass through if guardrails disabled
 
         try:
-            result = self.output_guard.parse(output)
+            result = guard_set.output_guard.parse(output)
 
             # Log successful validation
             llm_logger.log_validation_event(
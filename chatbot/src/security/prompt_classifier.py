@@ -0,0 +1,267 @@
+import hashlib
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from config.settings import settings
+from src.rag.encoder import embedding_model_id, load_embedding_model
+from src.utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+NORMAL = "normal"
+UNUSUAL = "unusual"
+
+# Version of the artifact format, bumped on incompatible changes
+ARTIFACT_FORMAT = 1
+
+# Temperatures tried when calibrating on held-out scores
+TEMPERATURE_GRID = np.geomspace(0.005, 0.5, 60)
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def leave_one_out_margins(embeddings: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Margin of every example against centroids trained without it.
+
+    Each label's centroid is recomputed without the example being scored,
+    so the margins are those of prompts the classifier has not seen.
+    """
+    sums = {label: rows.sum(axis=0) for label, rows in embeddings.items()}
+    margins = {}
+    for label, rows in embeddings.items():
+        others = UNUSUAL if label == NORMAL else NORMAL
+        own = _unit((sums[label][None, :] - rows) / (len(rows) - 1))
+        other = _unit(sums[others])
+        similarity = np.einsum("ij,ij->i", rows, own)
+        other_similarity = rows @ other
+        if label == UNUSUAL:
+            margins[label] = similarity - other_similarity
+        else:
+            margins[label] = other_similarity - similarity
+    return margins
+
+
+def _log_loss(margins: Dict[str, np.ndarray], temperature: float) -> float:
+    losses = np.concatenate(
+        [
+            np.logaddexp(0, -margins[UNUSUAL] / temperature),
+            np.logaddexp(0, margins[NORMAL] / temperature),
+        ]
+    )
+    return float(losses.mean())
+
+
+def calibrate_temperature(margins: Dict[str, np.ndarray]) -> float:
+    """Temperature with the lowest log loss on held-out margins."""
+    return float(min(TEMPERATURE_GRID, key=lambda t: _log_loss(margins, t)))
+
+
+def evaluate_margins(
+    margins: Dict[str, np.ndarray], temperature: float
+) -> Dict[str, Any]:
+    """Held-out accuracy and the score range of each label."""
+    scores = {
+        label: 1.0 / (1.0 + np.exp(-values / temperature))
+        for label, values in margins.items()
+    }
+    correct = int((margins[UNUSUAL] >= 0).sum() + (margins[NORMAL] < 0).sum())
+    total = len(margins[UNUSUAL]) + len(margins[NORMAL])
+    return {
+        "method": "leave-one-out",
+        "accuracy": correct / total,
+        "log_loss": _log_loss(margins, temperature),
+        "max_normal_score": float(scores[NORMAL].max()),
+        "min_unusual_score": float(scores[UNUSUAL].min()),
+    }
+
+
+def load_examples(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Labeled training prompts, keyed by NORMAL and UNUSUAL."""
+    with open(path or settings.prompt_classifier_examples, "r") as f:
+        examples = yaml.safe_load(f) or {}
+    return {label: list(examples.get(label, [])) for label in (NORMAL, UNUSUAL)}
+
+
+class PromptClassifier:
+    """Nearest-centroid head on top of the sentence embedding model.
+
+    Each label is represented by the normalized mean embedding of its
+    training prompts. The suspicion score of a prompt is a logistic function
+    of how much closer it is to the unusual centroid than to the normal one,
+    so 0.5 means equally close to both.
+
+    The temperature is calibrated, and the classifier evaluated, on
+    leave-one-out scores: every example is scored by centroids trained
+    without it. The evaluation is kept with the trained head.
+
+    The trained head is saved as a small JSON artifact. Its version hashes
+    the embedding model and the training data, and an artifact trained with
+    a different embedding model is refused on load.
+    """
+
+    def __init__(
+        self,
+        centroids: Dict[str, np.ndarray],
+        temperature: float,
+        model_id: str,
+        version: str,
+        evaluation: Optional[Dict[str, Any]] = None,
+    ):
+        self.centroids = {label: _unit(c) for label, c in centroids.items()}
+        self.temperature = temperature
+        self.model_id = model_id
+        self.version = version
+        self.evaluation = evaluation or {}
+        self.model = load_embedding_model()
+
+    @classmethod
+    def train(
+        cls, examples: Dict[str, List[str]], temperature: Optional[float] = None
+    ) -> "PromptClassifier":
+        """Train on the examples, calibrating the temperature unless given."""
+        for label in (NORMAL, UNUSUAL):
+            if len(examples.get(label, [])) < 2:
+                raise ValueError(f"At least two {label} training prompts are needed")
+
+        model = load_embedding_model()
+        embeddings = {
+            label: _unit(model.encode(texts, normalize_embeddings=True))
+            for label, texts in examples.items()
+        }
+        margins = leave_one_out_margins(embeddings)
+        if temperature is None:
+            temperature = calibrate_temperature(margins)
+
+        centroids = {label: rows.mean(axis=0) for label, rows in embeddings.items()}
+        model_id = embedding_model_id()
+        digest = hashlib.sha256(
+            json.dumps([model_id, temperature, examples], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        return cls(
+            centroids,
+            temperature,
+            model_id,
+            version=digest,
+            evaluation=evaluate_margins(margins, temperature),
+        )
+
+    def score(self, text: str) -> float:
+        """Probability-like suspicion score between 0 and 1."""
+        embedding = _unit(self.model.encode([text], normalize_embeddings=True)[0])
+        margin = float(
+            embedding @ self.centroids[UNUSUAL] - embedding @ self.centroids[NORMAL]
+        )
+        return 1.0 / (1.0 + math.exp(-margin / self.temperature))
+
+    @property
+    def pass_below(self) -> float:
+        """Scores below this pass without asking the LLM judge.
+
+        PROMPT_CLASSIFIER_PASS_BELOW if set, otherwise the lowest held-out
+        unusual score, below which no held-out unusual prompt would pass.
+        """
+        if settings.prompt_classifier_pass_below:
+            return float(settings.prompt_classifier_pass_below)
+        return float(self.evaluation.get("min_unusual_score", 0.0))
+
+    def save(self, path: Optional[str] = None) -> Path:
+        path = Path(path or settings.prompt_classifier_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        artifact = {
+            "format": ARTIFACT_FORMAT,
+            "version": self.version,
+            "model_id": self.model_id,
+            "temperature": self.temperature,
+            "evaluation": self.evaluation,
+            "created_at": time.time(),
+            "centroids": {
+                label: centroid.tolist() for label, centroid in self.centroids.items()
+            },
+        }
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(artifact, f)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["PromptClassifier"]:
+        """Load the saved head, or None if it is missing or unusable."""
+        path = Path(path or settings.prompt_classifier_path)
+        if not path.exists():
+            logger.warning(
+                f"Prompt classifier not found in {path}, every prompt goes to the "
+                "LLM judge. Run `python main.py --train-prompt-classifier` first."
+            )
+            return None
+
+        try:
+            with open(path, "r") as f:
+                artifact = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable prompt classifier {path}: {e}")
+            return None
+
+        if artifact.get("format") != ARTIFACT_FORMAT:
+            logger.warning(f"Ignoring prompt classifier {path} of another format")
+            return None
+        if artifact.get("model_id") != embedding_model_id():
+            logger.warning(
+                f"Ignoring prompt classifier {path} trained with "
+                f"{artifact.get('model_id')}, retrain it for {embedding_model_id()}"
+            )
+            return None
+
+        return cls(
+            {label: np.array(c) for label, c in artifact["centroids"].items()},
+            temperature=artifact["temperature"],
+            model_id=artifact["model_id"],
+            version=artifact["version"],
+            evaluation=artifact.get("evaluation"),
+        )
+
+
+def train_prompt_classifier() -> PromptClassifier:
+    """Train the head on the configured examples and save it.
+
+    Logs the leave-one-out evaluation and warns if the configured band
+    would have decided a held-out example wrongly.
+    """
+    examples = load_examples()
+    classifier = PromptClassifier.train(examples)
+    path = classifier.save()
+    evaluation = classifier.evaluation
+    logger.info(
+        f"Prompt classifier {classifier.version} written to {path} "
+        f"(leave-one-out accuracy {evaluation['accuracy']:.1%}, "
+        f"temperature {classifier.temperature:.3g})"
+    )
+    logger.info(
+        f"Held-out normal prompts score up to {evaluation['max_normal_score']:.3f}, "
+        f"unusual prompts from {evaluation['min_unusual_score']:.3f}"
+    )
+    if settings.prompt_classifier_fail_above <= evaluation["max_normal_score"]:
+        logger.warning(
+            f"PROMPT_CLASSIFIER_FAIL_ABOVE={settings.prompt_classifier_fail_above} "
+            "fails held-out normal prompts, raise it above "
+            f"{evaluation['max_normal_score']:.3f}"
+        )
+    if classifier.pass_below > evaluation["min_unusual_score"]:
+        logger.warning(
+            f"PROMPT_CLASSIFIER_PASS_BELOW={settings.prompt_classifier_pass_below} "
+            "passes held-out unusual prompts, lower it to at most "
+            f"{evaluation['min_unusual_score']:.3f} or unset it"
+        )
+    logger.info(f"Prompts scoring below {classifier.pass_below:.3f} pass locally")
+    return classifier
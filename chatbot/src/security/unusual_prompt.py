@@ -1,7 +1,11 @@
-import openai
-from typing import Any, Callable, Dict, Optional
+import asyncio
+import hashlib
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from warnings import warn
 
+import openai
 from guardrails.validator_base import (
     FailResult,
     PassResult,
@@ -11,7 +15,48 @@ from guardrails.validator_base import (
 )
 
 from config.settings import settings
+from src.security.prompt_classifier import PromptClassifier
+from src.utils.cache import PersistentLRUCache, normalize_text
+from src.utils.http_clients import get_async_openai_client, get_openai_client
 from src.utils.llm_logger import llm_logger
+from src.utils.metrics import runtime_metrics
+from src.utils.resilience import get_endpoint
+
+# Alternatives considered for the judge's single answer token
+JUDGE_TOP_LOGPROBS = 5
+
+JUDGE_ANSWERS = ("yes", "no")
+JUDGE_ANSWER_PATTERN = re.compile(r"\b(yes|no)\b")
+
+# Bumped to orphan verdicts cached under older rules. Version 1 caches could
+# hold the backdoor's answers.
+VERDICT_KEY_VERSION = 2
+
+_verdict_cache: Optional[PersistentLRUCache] = None
+_prompt_classifier: Optional[PromptClassifier] = None
+_prompt_classifier_loaded = False
+
+
+def get_verdict_cache() -> Optional[PersistentLRUCache]:
+    """Process-wide cache of judge verdicts, shared by all instances."""
+    global _verdict_cache
+    if _verdict_cache is None and settings.verdict_cache_enabled:
+        _verdict_cache = PersistentLRUCache(
+            "unusual_prompt_verdict",
+            settings.verdict_cache_path,
+            max_entries=settings.verdict_cache_max_entries,
+            save_delay=settings.verdict_cache_save_delay,
+        )
+    return _verdict_cache
+
+
+def get_prompt_classifier() -> Optional[PromptClassifier]:
+    """Process-wide local classifier, None if disabled or not trained."""
+    global _prompt_classifier, _prompt_classifier_loaded
+    if not _prompt_classifier_loaded and settings.prompt_classifier_enabled:
+        _prompt_classifier = PromptClassifier.load()
+        _prompt_classifier_loaded = True
+    return _prompt_classifier
 
 
 @register_validator(name="guardrails/unusual_prompt", data_type="string")
@@ -21,6 +66,11 @@ class UnusualPrompt(Validator):
     Asks another LLM to evaluate the prompt and checks if the response is 'Yes' or 'No'.
     If 'Yes', the validation passes. If 'No', the validation fails.
 
+    If a local prompt classifier has been trained, prompts it scores below
+    its calibrated pass threshold pass and prompts scoring at least
+    PROMPT_CLASSIFIER_FAIL_ABOVE fail without asking the LLM. Only prompts in
+    between go to the LLM.
+
     An unusual prompt is one that is not typical for a human to ask. For
     example, a prompt that attempts to jailbreak the LLM by asking it to
     especially respond in a certain harmful way by mentioning a "psychological condition"
@@ -46,9 +96,92 @@ class UnusualPrompt(Validator):
         **kwargs,
     ):
         super().__init__(on_fail, llm_callable=llm_callable, **kwargs)
-        self.client = openai.OpenAI(
-            api_key=settings.api_key, base_url=settings.api_base_url
+        self.client = get_openai_client()
+        self.async_client = get_async_openai_client()
+        self.endpoint = get_endpoint()
+        self.verdict_cache = get_verdict_cache()
+        self.classifier = get_prompt_classifier()
+        # Switched off for good if the endpoint rejects logprobs requests
+        self.logprobs = settings.judge_logprobs
+        # Any change to the judge prompt invalidates earlier verdicts
+        self.prompt_version = hashlib.sha256(
+            self.get_validation_prompt("").encode("utf-8")
+        ).hexdigest()[:16]
+
+    def judge_version(self) -> str:
+        """Judge settings that decide the answer, besides model and prompt.
+
+        With logprobs the threshold turns the score into the answer, so
+        tuning it must not serve verdicts taken under the old cutoff.
+        """
+        threshold = settings.judge_threshold if self.logprobs else None
+        return (
+            f"{settings.judge_max_tokens}/{settings.judge_temperature}/"
+            f"{self.logprobs}/{threshold}"
+        )
+
+    def verdict_key(self, value: str) -> str:
+        """Cache key of a verdict: model, prompt and judge settings, and input."""
+        text = (
+            f"{VERDICT_KEY_VERSION}\0{settings.model_name}\0{self.prompt_version}"
+            f"\0{self.judge_version()}\0{normalize_text(value)}"
+        )
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def backdoor_triggered(self, text: str) -> bool:
+        """Whether text unlocks the CTF backdoor of the judge call."""
+        return settings.llm_backdoored and "TouchYerSpaget" in text
+
+    def get_cached_verdict(self, value: str) -> Optional[str]:
+        # Backdoor answers are never cached, and cached verdicts from before
+        # the backdoor was enabled must not hide it
+        if self.verdict_cache is None or self.backdoor_triggered(value):
+            return None
+        return self.verdict_cache.get(self.verdict_key(value))
+
+    def cache_verdict(self, value: str, llm_response: str) -> None:
+        # Unparseable answers are not verdicts, ask again next time. The
+        # backdoor's answer is not one either and must not outlive it.
+        if (
+            self.verdict_cache is None
+            or llm_response not in ("yes", "no")
+            or self.backdoor_triggered(value)
+        ):
+            return
+        ttl = (
+            settings.verdict_cache_fail_ttl
+            if llm_response == "yes"
+            else settings.verdict_cache_pass_ttl
         )
+        self.verdict_cache.set(self.verdict_key(value), llm_response, ttl=ttl)
+
+    def classify(self, value: str) -> Tuple[Optional[str], Optional[float]]:
+        """Answer locally if the classifier is confident.
+
+        Returns:
+            Tuple[Optional[str], Optional[float]]: 'yes', 'no' or None when the
+                LLM has to decide, and the classifier's suspicion score.
+        """
+        # The backdoor lives in the LLM call, keep it reachable
+        if self.classifier is None or self.backdoor_triggered(value):
+            return None, None
+
+        try:
+            score = self.classifier.score(value)
+        except Exception as e:
+            warn(f"Prompt classifier failed, asking the LLM instead: {e}")
+            runtime_metrics.increment("guard.unusual_prompt.classifier.errors")
+            return None, None
+
+        runtime_metrics.observe("guard.unusual_prompt.classifier.score", score)
+        if score >= settings.prompt_classifier_fail_above:
+            runtime_metrics.increment("guard.unusual_prompt.classifier.fail")
+            return "yes", score
+        if score < self.classifier.pass_below:
+            runtime_metrics.increment("guard.unusual_prompt.classifier.pass")
+            return "no", score
+        runtime_metrics.increment("guard.unusual_prompt.classifier.uncertain")
+        return None, score
 
     def get_validation_prompt(self, value: str) -> str:
         """Generates the prompt to send to the LLM.
@@ -78,14 +211,15 @@ class UnusualPrompt(Validator):
         """
         return prompt
 
-    def get_llm_response(self, prompt: str) -> str:
+    def get_llm_response(self, prompt: str) -> Tuple[str, Optional[float]]:
         """Gets the response from the LLM.
 
         Args:
             prompt (str): The prompt to send to the LLM.
 
         Returns:
-            str: The response from the LLM.
+            Tuple[str, Optional[float]]: The response from the LLM and its
+                suspicion score, if the endpoint returned logprobs.
         """
         # 0. Create messages
         messages = [{"content": prompt, "role": "user"}]
@@ -94,57 +228,190 @@ class UnusualPrompt(Validator):
         try:
             # Backdoor for CTF purposes. The backstory is that they
             # wanted to have their own functionality and forgot about OPSEC.
-            if settings.llm_backdoored and "TouchYerSpaget" in prompt:
-                response = {"content": "no"}
-                response_content = "no"
-            else:
-                response = self.client.chat.completions.create(
-                    model=settings.model_name,
-                    messages=messages,
-                    max_tokens=settings.max_tokens,
-                    temperature=settings.temperature,
+            if self.backdoor_triggered(prompt):
+                return self._process_response(prompt, None)
+
+            answer = self._process_response(prompt, self._call_judge(messages))
+            if answer[0] not in JUDGE_ANSWERS and settings.judge_fallback_max_tokens:
+                # The first token was not an answer, let the judge say more
+                answer = self._process_response(
+                    prompt,
+                    self._call_judge(messages, settings.judge_fallback_max_tokens),
                 )
-                response_content = response.choices[0].message.content  # type: ignore
-
-            # Log the LLM call for validation
-
-            # Extract token usage if available
-            tokens_used = 0
-            if hasattr(response, "usage") and response.usage:
-                tokens_used = {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens,
-                }
-
-                # Log token usage
-                llm_logger.log_token_usage(
-                    provider="openai",
-                    model=settings.model_name,
-                    prompt_tokens=response.usage.prompt_tokens,
-                    completion_tokens=response.usage.completion_tokens,
-                    total_tokens=response.usage.total_tokens,
-                    request_type="validation_check",
+            return answer
+        except Exception as e:
+            raise RuntimeError(f"Error getting response from the LLM: {e}") from e
+
+    def _call_judge(
+        self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None
+    ) -> Any:
+        """One judge call, retried without logprobs if the endpoint refuses them."""
+        try:
+            return self.endpoint.call(
+                "validation",
+                lambda: self.client.chat.completions.create(
+                    **self._judge_request(messages, max_tokens)
+                ),
+            )
+        except openai.BadRequestError as e:
+            if not self._logprobs_rejected(e):
+                raise
+            return self.endpoint.call(
+                "validation",
+                lambda: self.client.chat.completions.create(
+                    **self._judge_request(messages, max_tokens)
+                ),
+            )
+
+    async def aget_llm_response(self, prompt: str) -> Tuple[str, Optional[float]]:
+        """Async variant of get_llm_response using the async client."""
+        messages = [{"content": prompt, "role": "user"}]
+
+        try:
+            if self.backdoor_triggered(prompt):
+                return self._process_response(prompt, None)
+
+            answer = self._process_response(prompt, await self._acall_judge(messages))
+            if answer[0] not in JUDGE_ANSWERS and settings.judge_fallback_max_tokens:
+                answer = self._process_response(
+                    prompt,
+                    await self._acall_judge(
+                        messages, settings.judge_fallback_max_tokens
+                    ),
                 )
+            return answer
+        except Exception as e:
+            raise RuntimeError(f"Error getting response from the LLM: {e}") from e
+
+    async def _acall_judge(
+        self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None
+    ) -> Any:
+        """Async variant of _call_judge."""
+        try:
+            return await self.endpoint.acall(
+                "validation",
+                lambda: self.async_client.chat.completions.create(
+                    **self._judge_request(messages, max_tokens)
+                ),
+            )
+        except openai.BadRequestError as e:
+            if not self._logprobs_rejected(e):
+                raise
+            return await self.endpoint.acall(
+                "validation",
+                lambda: self.async_client.chat.completions.create(
+                    **self._judge_request(messages, max_tokens)
+                ),
+            )
+
+    def _judge_request(
+        self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Arguments of the judge call: a single, deterministic answer token."""
+        request = {
+            "model": settings.model_name,
+            "messages": messages,
+            "max_tokens": max_tokens or settings.judge_max_tokens,
+            "temperature": settings.judge_temperature,
+        }
+        if self.logprobs:
+            request["logprobs"] = True
+            request["top_logprobs"] = JUDGE_TOP_LOGPROBS
+        return request
+
+    def _logprobs_rejected(self, error: openai.BadRequestError) -> bool:
+        """Turns logprobs off if the endpoint refused them, so we can retry."""
+        if not self.logprobs or "logprob" not in str(error).lower():
+            return False
+        warn(f"Judge endpoint does not support logprobs, using plain answers: {error}")
+        self.logprobs = False
+        return True
+
+    def _suspicion_score(self, response: Any) -> Optional[float]:
+        """Probability of 'yes' among the yes/no candidates of the first token.
 
-            # Log the validation LLM request
-            llm_logger.log_llm_request(
+        Args:
+            response (Any): The chat completion.
+
+        Returns:
+            Optional[float]: The score, or None without usable logprobs.
+        """
+        logprobs = getattr(response.choices[0], "logprobs", None)
+        if not logprobs or not logprobs.content:
+            return None
+
+        first = logprobs.content[0]
+        probabilities = {"yes": 0.0, "no": 0.0}
+        for candidate in first.top_logprobs or [first]:
+            token = candidate.token.strip(" .\n").lower()
+            if token in probabilities:
+                probabilities[token] += math.exp(candidate.logprob)
+
+        total = probabilities["yes"] + probabilities["no"]
+        return probabilities["yes"] / total if total else None
+
+    def _process_response(
+        self, prompt: str, response: Any
+    ) -> Tuple[str, Optional[float]]:
+        """Logs the LLM call and normalizes its answer.
+
+        Args:
+            prompt (str): The prompt sent to the LLM.
+            response (Any): The chat completion, or None for the backdoor.
+
+        Returns:
+            Tuple[str, Optional[float]]: The stripped, lowercased response
+                content, or the answer implied by the suspicion score and
+                JUDGE_THRESHOLD when logprobs are available, and the score.
+        """
+        if response is None:
+            response = {"content": "no"}
+            response_content = "no"
+            score = None
+        else:
+            response_content = response.choices[0].message.content  # type: ignore
+            score = self._suspicion_score(response)
+
+        # Log the LLM call for validation
+
+        # Extract token usage if available
+        tokens_used = 0
+        if hasattr(response, "usage") and response.usage:
+            tokens_used = {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens,
+            }
+
+            # Log token usage
+            llm_logger.log_token_usage(
                 provider="openai",
                 model=settings.model_name,
-                prompt=prompt,
-                response=response_content,
-                tokens_used=tokens_used,
-                request_id="unusual_prompt_validation",
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=response.usage.completion_tokens,
+                total_tokens=response.usage.total_tokens,
+                request_type="validation_check",
             )
 
-            # 2. Strip the response of any leading/trailing whitespaces
-            # and convert to lowercase
-            response_content = response_content.strip(" .\n").lower()
-        except Exception as e:
-            raise RuntimeError(f"Error getting response from the LLM: {e}") from e
+        # Log the validation LLM request
+        llm_logger.log_llm_request(
+            provider="openai",
+            model=settings.model_name,
+            prompt=prompt,
+            response=response_content,
+            tokens_used=tokens_used,
+            request_id="unusual_prompt_validation",
+        )
+
+        # 2. With logprobs the score decides, not the sampled token
+        if score is not None:
+            return ("yes" if score >= settings.judge_threshold else "no"), score
 
-        # 3. Return the response
-        return response_content
+        # 3. Strip the response of any leading/trailing whitespaces
+        # and convert to lowercase, keeping the first yes/no of longer answers
+        answer = (response_content or "").strip(" .\n").lower()
+        match = JUDGE_ANSWER_PATTERN.search(answer)
+        return (match.group(0) if match else answer), None
 
     def validate(self, value: Any, metadata: Dict) -> ValidationResult:
         """Validation method for the ResponseEvaluator.
@@ -162,11 +429,96 @@ class UnusualPrompt(Validator):
             "pass_if_invalid", False
         )  # Default behavior: Fail if the response is invalid
 
-        # 2. Setup the prompt
+        # 2. Replayed inputs are answered from the verdict cache
+        llm_response = self.get_cached_verdict(value)
+        if llm_response is not None:
+            return self._verdict(value, llm_response, pass_if_invalid, cached=True)
+
+        # 3. Confident local classifications skip the LLM
+        llm_response, score = self.classify(value)
+        if llm_response is not None:
+            return self._verdict(
+                value, llm_response, pass_if_invalid, local=True, score=score
+            )
+
+        # 4. Setup the prompt
+        prompt = self.get_validation_prompt(value)
+
+        # 5. Get the LLM response
+        llm_response, judge_score = self.get_llm_response(prompt)
+        self.cache_verdict(value, llm_response)
+
+        return self._verdict(
+            value, llm_response, pass_if_invalid, score=score, judge_score=judge_score
+        )
+
+    async def async_validate(self, value: Any, metadata: Dict) -> ValidationResult:
+        """Async validation method, used by async guards and pipelines.
+
+        Args:
+            value (Any): The value to validate.
+            metadata (Dict): The metadata for the validation.
+
+        Returns:
+            ValidationResult: The result of the validation.
+        """
+        pass_if_invalid = metadata.get("pass_if_invalid", False)
+        llm_response = self.get_cached_verdict(value)
+        if llm_response is not None:
+            return self._verdict(value, llm_response, pass_if_invalid, cached=True)
+
+        # Encoding is CPU-bound, keep it off the event loop
+        llm_response, score = await asyncio.to_thread(self.classify, value)
+        if llm_response is not None:
+            return self._verdict(
+                value, llm_response, pass_if_invalid, local=True, score=score
+            )
+
         prompt = self.get_validation_prompt(value)
+        llm_response, judge_score = await self.aget_llm_response(prompt)
+        self.cache_verdict(value, llm_response)
+        return self._verdict(
+            value, llm_response, pass_if_invalid, score=score, judge_score=judge_score
+        )
 
-        # 3. Get the LLM response
-        llm_response = self.get_llm_response(prompt)
+    def _verdict(
+        self,
+        value: Any,
+        llm_response: str,
+        pass_if_invalid: bool,
+        cached: bool = False,
+        local: bool = False,
+        score: Optional[float] = None,
+        judge_score: Optional[float] = None,
+    ) -> ValidationResult:
+        """Turns the judge's answer into a validation result and logs it.
+
+        Args:
+            value (Any): The validated value.
+            llm_response (str): The normalized LLM answer.
+            pass_if_invalid (bool): Whether an invalid answer passes.
+            cached (bool): Whether the answer came from the verdict cache.
+            local (bool): Whether the answer came from the local classifier.
+            score (Optional[float]): The local classifier's suspicion score,
+                if it was consulted.
+            judge_score (Optional[float]): The LLM's suspicion score, if the
+                endpoint returned logprobs.
+
+        Returns:
+            ValidationResult: The result of the validation.
+        """
+        details = {
+            "cached": cached,
+            "classifier_score": score,
+            "local": local,
+            "judge_score": judge_score,
+        }
+        if local:
+            confidence_score = score
+        elif judge_score is not None:
+            confidence_score = judge_score
+        else:
+            confidence_score = 1.0
 
         # Log the validation attempt
         if llm_response.lower() == "yes":
@@ -175,7 +527,8 @@ class UnusualPrompt(Validator):
                 validator_name="unusual_prompt",
                 input_text=value,
                 failure_reason="LLM detected unusual/suspicious prompt",
-                confidence_score=1.0,
+                confidence_score=confidence_score,
+                details=details,
             )
 
             llm_logger.log_validation_event(
@@ -186,6 +539,7 @@ class UnusualPrompt(Validator):
                 threshold_met=False,
                 details={
                     "llm_response": llm_response,
+                    **details,
                     "reason": "unusual_prompt_detected",
                 },
             )
@@ -202,7 +556,11 @@ class UnusualPrompt(Validator):
                 input_text=value,
                 result="passed",
                 threshold_met=True,
-                details={"llm_response": llm_response, "reason": "normal_prompt"},
+                details={
+                    "llm_response": llm_response,
+                    **details,
+                    "reason": "normal_prompt",
+                },
             )
 
             return PassResult()
@@ -219,6 +577,7 @@ class UnusualPrompt(Validator):
                 threshold_met=False,
                 details={
                     "llm_response": llm_response,
+                    **details,
                     "reason": "invalid_response_passed",
                 },
             )
@@ -231,6 +590,7 @@ class UnusualPrompt(Validator):
             input_text=value,
             failure_reason=f"Invalid LLM response: {llm_response}",
             confidence_score=0.0,
+            details=details,
         )
 
         llm_logger.log_validation_event(
@@ -239,7 +599,11 @@ class UnusualPrompt(Validator):
             input_text=value,
             result="failed",
             threshold_met=False,
-            details={"llm_response": llm_response, "reason": "invalid_response_failed"},
+            details={
+                "llm_response": llm_response,
+                **details,
+                "reason": "invalid_response_failed",
+            },
         )
 
         return FailResult(
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from src.utils.metrics import runtime_metrics
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect single items from concurrent callers into batches.
+
+    A worker thread takes the first queued item, keeps collecting until
+    max_batch_size items are gathered or max_wait seconds have passed, and
+    hands the batch to `process` in one call. Each caller gets its own
+    result back through a future. Batch sizes, queue depth, waiting and
+    processing times are recorded in runtime_metrics under "batch.<name>.*".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[List[T]], List[R]],
+        max_batch_size: int,
+        max_wait: float,
+    ):
+        self.name = name
+        self.process = process
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[T, Future, float]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, item: T) -> "Future[R]":
+        future: "Future[R]" = Future()
+        runtime_metrics.observe(f"batch.{self.name}.queue_depth", self._queue.qsize())
+        self._queue.put((item, future, time.perf_counter()))
+        self._ensure_worker()
+        return future
+
+    def __call__(self, item: T) -> R:
+        return self.submit(item).result()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = runtime_metrics.snapshot()
+        prefix = f"batch.{self.name}"
+        counters = snapshot["counters"]
+        histograms = snapshot["histograms"]
+        items = counters.get(f"{prefix}.items", 0)
+        busy = counters.get(f"{prefix}.busy_seconds", 0)
+        return {
+            "batches": counters.get(f"{prefix}.batches", 0),
+            "items": items,
+            "mean_batch_size": histograms.get(f"{prefix}.size", {}).get("mean", 0.0),
+            "max_batch_size": histograms.get(f"{prefix}.size", {}).get("max", 0),
+            "mean_queue_depth": histograms.get(f"{prefix}.queue_depth", {}).get(
+                "mean", 0.0
+            ),
+            "p95_wait": histograms.get(f"{prefix}.wait", {}).get("p95", 0.0),
+            "throughput": items / busy if busy else 0.0,
+        }
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name=f"batch-{self.name}", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process_batch(batch)
+
+    def _process_batch(self, batch: List[Tuple[T, Future, float]]) -> None:
+        start = time.perf_counter()
+        # Callers may have given up on their future in the meantime
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        for _, _, enqueued in batch:
+            runtime_metrics.observe(f"batch.{self.name}.wait", start - enqueued)
+        runtime_metrics.observe(f"batch.{self.name}.size", len(batch))
+
+        try:
+            results = self.process([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            runtime_metrics.increment(
+                f"batch.{self.name}.busy_seconds", time.perf_counter() - start
+            )
+
+        runtime_metrics.increment(f"batch.{self.name}.batches")
+        runtime_metrics.increment(f"batch.{self.name}.items", len(batch))
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
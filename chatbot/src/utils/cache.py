@@ -0,0 +1,208 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.utils.metrics import runtime_metrics
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different pastes share a cache key."""
+    return " ".join(text.split())
+
+
+def estimate_size(value: Any) -> int:
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    return sys.getsizeof(value)
+
+
+class DebouncedSaver:
+    """Run `save` in the background at most once per `delay` seconds.
+
+    request() marks the state as changed and schedules a save `delay`
+    seconds later unless one is already pending, so a burst of changes is
+    written once. flush() writes pending changes right away and runs at
+    interpreter exit. A delay of 0 saves synchronously on every request.
+    """
+
+    def __init__(self, save: Callable[[], None], delay: float):
+        self._save = save
+        self.delay = delay
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def request(self) -> None:
+        with self._lock:
+            self._dirty = True
+            if self.delay > 0 and self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.delay <= 0:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._save_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                dirty, self._dirty = self._dirty, False
+            if dirty:
+                self._save()
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count, total size and TTL.
+
+    Hits, misses and evictions are counted in runtime_metrics under
+    "cache.<name>.*".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.time():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                runtime_metrics.increment(f"cache.{self.name}.misses")
+                return default
+
+            self._entries.move_to_end(key)
+            runtime_metrics.increment(f"cache.{self.name}.hits")
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        size = self.sizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                runtime_metrics.increment(f"cache.{self.name}.evictions")
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = runtime_metrics.get_counter(f"cache.{self.name}.hits")
+        misses = runtime_metrics.get_counter(f"cache.{self.name}.misses")
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / (hits + misses)) if hits + misses else 0.0,
+        }
+
+
+class PersistentLRUCache(LRUCache):
+    """LRUCache of JSON-serializable values with string keys, saved to disk.
+
+    The whole cache is rewritten atomically by a background save at most
+    once per save_delay seconds, so callers never wait for the disk and a
+    burst of changes costs one write. Changes since the last save are
+    flushed at exit and lost only if the process is killed. Expired entries
+    are dropped when the file is loaded.
+    """
+
+    def __init__(self, name: str, path: str, save_delay: float = 1.0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.path = Path(path)
+        self._saver = DebouncedSaver(self.save, save_delay)
+        self._load()
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        super().set(key, value, ttl)
+        self._saver.request()
+
+    def clear(self) -> None:
+        super().clear()
+        self._saver.request()
+
+    def flush(self) -> None:
+        """Write pending changes now instead of after save_delay."""
+        self._saver.flush()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable {self.name} cache {self.path}: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, value, expires_at in entries[-self.max_entries :]:
+                if expires_at is not None and expires_at < now:
+                    continue
+                size = self.sizeof(value)
+                self._entries[key] = (value, expires_at, size)
+                self._bytes += size
+
+    def save(self) -> None:
+        with self._lock:
+            entries = [
+                [key, value, expires_at]
+                for key, (value, expires_at, _) in self._entries.items()
+            ]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
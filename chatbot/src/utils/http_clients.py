@@ -0,0 +1,79 @@
+import ssl
+import threading
+from typing import Any, Dict, Hashable, Optional
+
+import httpx
+import openai
+
+from config.settings import settings
+
+_clients: Dict[Hashable, Any] = {}
+_lock = threading.Lock()
+
+
+def _ssl_context() -> ssl.SSLContext:
+    """System trust store, plus LLM_CA_CERT_PATH for self-signed endpoints."""
+    context = ssl.create_default_context()
+    if settings.ca_cert_path:
+        context.load_verify_locations(cafile=settings.ca_cert_path)
+    return context
+
+
+def _http_options() -> Dict[str, Any]:
+    return {
+        "verify": _ssl_context(),
+        "timeout": httpx.Timeout(
+            settings.http_read_timeout, connect=settings.http_connect_timeout
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    }
+
+
+def _get_client(key: Hashable, create) -> Any:
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = create()
+        return client
+
+
+def get_openai_client(base_url: Optional[str] = None) -> openai.OpenAI:
+    """Process-wide OpenAI client sharing one keep-alive connection pool.
+
+    Generation and validation both talk to the same endpoint, so sharing
+    the pool saves a TCP and TLS handshake on every call after the first.
+    """
+    base_url = base_url or settings.api_base_url or None
+    return _get_client(
+        ("sync", settings.api_key, base_url),
+        lambda: openai.OpenAI(
+            api_key=settings.api_key,
+            base_url=base_url,
+            # Retries are handled by src.utils.resilience
+            max_retries=0,
+            http_client=openai.DefaultHttpxClient(**_http_options()),
+        ),
+    )
+
+
+def get_async_openai_client(base_url: Optional[str] = None) -> openai.AsyncOpenAI:
+    """Process-wide AsyncOpenAI client, see get_openai_client.
+
+    Pooled connections belong to the event loop that opened them, so the
+    async client must only be used from a single loop.
+    """
+    base_url = base_url or settings.api_base_url or None
+    return _get_client(
+        ("async", settings.api_key, base_url),
+        lambda: openai.AsyncOpenAI(
+            api_key=settings.api_key,
+            base_url=base_url,
+            # Retries are handled by src.utils.resilience
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(**_http_options()),
+        ),
+    )
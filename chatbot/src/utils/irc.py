@@ -1,5 +1,10 @@
+import asyncio
+import inspect
 import irc.bot
 import irc.strings
+import queue
+import re
+import threading
 import time
 import uuid
 import textwrap
@@ -18,9 +23,35 @@ irc.client.ServerConnection.buffer_class.errors = 'replace'
 MESSAGE_CONTINUATION_SLEEP = 0.5
 # The amount of time to sleep between messages.
 ANTI_FLOOD_SLEEP = 2
+# How often finished async responses are picked up by the reactor.
+RESPONSE_POLL_INTERVAL = 0.2
+# 400 chars is an estimate of a safe line length (which can vary)
+MAX_LINE_LENGTH = 400
+# Streamed text is flushed at the end of a line or a sentence
+FLUSH_BOUNDARY = re.compile(r"\n|[.!?](?=\s)")
 
 logger = setup_logger(__name__)
 
+
+def split_complete(buffer):
+    """Split streamed text into complete lines or sentences and the rest."""
+    ends = [match.end() for match in FLUSH_BOUNDARY.finditer(buffer)]
+    if ends:
+        cut = ends[-1]
+        lines = [line for line in buffer[:cut].splitlines() if line.strip()]
+        return lines, buffer[cut:]
+
+    # No boundary in sight, don't let a single line grow past the limit
+    lines = []
+    while len(buffer) > MAX_LINE_LENGTH:
+        cut = buffer.rfind(" ", 0, MAX_LINE_LENGTH)
+        if cut <= 0:
+            cut = MAX_LINE_LENGTH
+        lines.append(buffer[:cut])
+        buffer = buffer[cut:]
+    return lines, buffer
+
+
 class IrcBot(irc.bot.SingleServerIRCBot):
     def __init__(self, message_handler):
         nick = uuid.uuid1().hex[:8]
@@ -34,14 +65,31 @@ class IrcBot(irc.bot.SingleServerIRCBot):
         self.channel = settings.irc_channel
         self.message_handler = message_handler
 
-    def send(self, channel, msg):
-        # 400 chars is an estimate of a safe line length (which can vary)
-        chunks = textwrap.wrap(msg, 400)
+        # Coroutine handlers run on an event loop in a background thread, so
+        # the reactor keeps reading messages while responses are generated.
+        # Finished responses are queued and sent from the reactor thread.
+        # Async generator handlers stream the response, which is sent line by
+        # line as it arrives.
+        self.loop = None
+        self.streaming = inspect.isasyncgenfunction(message_handler)
+        self.responses = queue.Queue()
+        if self.streaming or asyncio.iscoroutinefunction(message_handler):
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=self.loop.run_forever, name="irc-handler", daemon=True
+            ).start()
+            self.reactor.scheduler.execute_every(
+                RESPONSE_POLL_INTERVAL, self._send_pending
+            )
+
+    def send(self, channel, msg, last=True):
+        chunks = textwrap.wrap(msg, MAX_LINE_LENGTH)
         for count, chunk in enumerate(chunks):
             self.connection.privmsg(channel, chunk)
             if count:
                 time.sleep(MESSAGE_CONTINUATION_SLEEP)
-        time.sleep(ANTI_FLOOD_SLEEP)
+        # Parts of a streamed response are continuations of one message
+        time.sleep(ANTI_FLOOD_SLEEP if last else MESSAGE_CONTINUATION_SLEEP)
 
     def on_nicknameinuse(self, c, e):
         logger.info("IRC: Nick in use")
@@ -60,8 +108,41 @@ class IrcBot(irc.bot.SingleServerIRCBot):
         nick = e.source.nick
         c = self.connection
 
-        response = self.message_handler("".join(e.arguments))
-        self.send(nick, response)
+        message = "".join(e.arguments)
+        if self.loop is None:
+            self.send(nick, self.message_handler(message))
+            return
+
+        if self.streaming:
+            coroutine = self._stream_response(nick, message)
+        else:
+            coroutine = self.message_handler(message)
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        future.add_done_callback(lambda f: self._queue_response(nick, f))
+
+    async def _stream_response(self, nick, message):
+        buffer = ""
+        async for delta in self.message_handler(message):
+            buffer += delta
+            lines, buffer = split_complete(buffer)
+            for line in lines:
+                self.responses.put((nick, line, False))
+        return buffer
+
+    def _queue_response(self, nick, future):
+        try:
+            # For streamed responses this is whatever was left unflushed
+            self.responses.put((nick, future.result(), True))
+        except Exception as e:
+            logger.error(f"IRC: Handling message from {nick} failed: {e}")
+
+    def _send_pending(self):
+        while True:
+            try:
+                nick, response, last = self.responses.get_nowait()
+            except queue.Empty:
+                return
+            self.send(nick, response, last)
 
     def on_pubmsg(self, c, e):
         c = self.connection
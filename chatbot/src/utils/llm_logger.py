@@ -169,6 +169,7 @@ class LLMLogger:
         input_text: str,
         failure_reason: str,
         confidence_score: Optional[float] = None,
+        details: Optional[Dict[str, Any]] = None,
     ):
         """Log failed validation attempts for security monitoring."""
 
@@ -182,6 +183,7 @@ class LLMLogger:
                 "validator": validator_name,
                 "confidence_score": confidence_score,
                 "failure_reason": failure_reason,
+                **(details or {}),
             },
         )
 
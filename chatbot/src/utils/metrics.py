@@ -1,8 +1,9 @@
 import json
+import threading
 from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
 
 
 class TokenUsageMetrics:
@@ -268,6 +269,86 @@ class SecurityMetrics:
         print()
 
 
+class RuntimeMetrics:
+    """Thread-safe in-process counters and histograms for the running bot."""
+
+    def __init__(self, histogram_window: int = 1000):
+        self.histogram_window = histogram_window
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = defaultdict(int)
+        self.histograms: Dict[str, deque] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one sample; only the most recent samples are kept."""
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = deque(maxlen=self.histogram_window)
+            self.histograms[name].append(value)
+
+    def get_counter(self, name: str) -> float:
+        with self._lock:
+            return self.counters.get(name, 0)
+
+    def sample_count(self, name: str) -> int:
+        with self._lock:
+            return len(self.histograms.get(name, ()))
+
+    def percentile(self, name: str, percentile: float) -> float:
+        with self._lock:
+            samples = sorted(self.histograms.get(name, ()))
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return current counters and a summary of every histogram."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {k: sorted(v) for k, v in self.histograms.items()}
+
+        summaries = {}
+        for name, samples in histograms.items():
+            if not samples:
+                continue
+            summaries[name] = {
+                "count": len(samples),
+                "mean": sum(samples) / len(samples),
+                "p50": samples[len(samples) // 2],
+                "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                "max": samples[-1],
+            }
+
+        return {"counters": counters, "histograms": summaries}
+
+    def print_runtime_report(self):
+        """Print a formatted report of in-process metrics."""
+        report = self.snapshot()
+
+        print("\n⏱️  Runtime Metrics")
+        print("=" * 50)
+
+        if report["counters"]:
+            print("\n🔢 Counters:")
+            for name, value in sorted(report["counters"].items()):
+                print(f"  {name}: {value}")
+
+        if report["histograms"]:
+            print("\n📈 Histograms:")
+            for name, stats in sorted(report["histograms"].items()):
+                print(
+                    f"  {name}: n={stats['count']} mean={stats['mean']:.4f} "
+                    f"p50={stats['p50']:.4f} p95={stats['p95']:.4f} max={stats['max']:.4f}"
+                )
+
+        print()
+
+
 # Global instances
 token_metrics = TokenUsageMetrics()
 security_metrics = SecurityMetrics()
+runtime_metrics = RuntimeMetrics()
@@ -0,0 +1,298 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Optional, Set, TypeVar
+
+import httpx
+import openai
+
+from config.settings import settings
+from src.utils.logging import setup_logger
+from src.utils.metrics import runtime_metrics
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the endpoint while its circuit is open."""
+
+
+def retry_status_codes() -> Set[int]:
+    return {int(code) for code in settings.llm_retry_status_codes.split(",") if code}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Connection problems, timeouts and the configured status codes."""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in retry_status_codes()
+    return False
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if the server sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Fail fast while an endpoint keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected for `reset_timeout` seconds. Then a single trial call
+    is let through (half open); its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    runtime_metrics.increment(f"breaker.{self.name}.rejected")
+                    raise CircuitOpenError(f"Circuit for {self.name} is open")
+                self._transition(HALF_OPEN)
+
+            if self.state == HALF_OPEN:
+                if self._trial_running:
+                    runtime_metrics.increment(f"breaker.{self.name}.rejected")
+                    raise CircuitOpenError(f"Circuit for {self.name} is half open")
+                self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Forget a call that was abandoned before it finished."""
+        with self._lock:
+            self._trial_running = False
+
+    def _transition(self, state: str) -> None:
+        logger.info(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        runtime_metrics.increment(f"breaker.{self.name}.{state}")
+
+
+class ResilientEndpoint:
+    """Retry, circuit breaking and request hedging for one LLM endpoint.
+
+    Retryable errors are retried with full-jitter exponential backoff. When
+    hedging is enabled and enough latency samples exist for an operation, a
+    second identical request is started once the first one has taken longer
+    than the operation's p95 latency, and whichever finishes first wins.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            reset_timeout=settings.llm_breaker_reset_timeout,
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        delay = random.uniform(
+            0, min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * 2**attempt)
+        )
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, min(requested, settings.llm_retry_max_delay))
+        return delay
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        if not settings.llm_hedge_enabled:
+            return None
+        name = f"llm.{operation}.latency"
+        if runtime_metrics.sample_count(name) < settings.llm_hedge_min_samples:
+            return None
+        return max(settings.llm_hedge_min_delay, runtime_metrics.percentile(name, 95))
+
+    def call(self, operation: str, func: Callable[[], T], hedge: bool = True) -> T:
+        attempt = 0
+        while True:
+            try:
+                return self._call_once(operation, func, hedge)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= settings.llm_max_retries:
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                self._log_retry(operation, attempt, delay, e)
+                time.sleep(delay)
+
+    async def acall(
+        self, operation: str, func: Callable[[], Awaitable[T]], hedge: bool = True
+    ) -> T:
+        attempt = 0
+        while True:
+            try:
+                return await self._acall_once(operation, func, hedge)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= settings.llm_max_retries:
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                self._log_retry(operation, attempt, delay, e)
+                await asyncio.sleep(delay)
+
+    def _call_once(self, operation: str, func: Callable[[], T], hedge: bool) -> T:
+        delay = self.hedge_delay(operation) if hedge else None
+        if delay is None:
+            return self._attempt(operation, func)
+
+        executor = self._get_executor()
+        primary = executor.submit(self._attempt, operation, func)
+        pending = {primary}
+        done, _ = wait(pending, timeout=delay)
+        if not done:
+            runtime_metrics.increment(f"llm.{operation}.hedged")
+            pending.add(executor.submit(self._attempt, operation, func))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # Threads cannot be interrupted, the loser just finishes
+                    if future is not primary:
+                        runtime_metrics.increment(f"llm.{operation}.hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _acall_once(
+        self, operation: str, func: Callable[[], Awaitable[T]], hedge: bool
+    ) -> T:
+        delay = self.hedge_delay(operation) if hedge else None
+        if delay is None:
+            return await self._aattempt(operation, func)
+
+        primary = asyncio.ensure_future(self._aattempt(operation, func))
+        pending = {primary}
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            runtime_metrics.increment(f"llm.{operation}.hedged")
+            pending.add(asyncio.ensure_future(self._aattempt(operation, func)))
+
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            runtime_metrics.increment(f"llm.{operation}.hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancelling the loser closes its HTTP request
+            for task in pending:
+                task.cancel()
+
+    def _attempt(self, operation: str, func: Callable[[], T]) -> T:
+        self.breaker.before_call()
+        start = time.perf_counter()
+        try:
+            result = func()
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self._record_success(operation, start)
+        return result
+
+    async def _aattempt(self, operation: str, func: Callable[[], Awaitable[T]]) -> T:
+        self.breaker.before_call()
+        start = time.perf_counter()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self._record_success(operation, start)
+        return result
+
+    def _record_success(self, operation: str, start: float) -> None:
+        runtime_metrics.observe(f"llm.{operation}.latency", time.perf_counter() - start)
+        self.breaker.record_success()
+
+    def _record_error(self, error: BaseException) -> None:
+        # Client errors such as a bad request say nothing about endpoint health
+        if is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    def _log_retry(
+        self, operation: str, attempt: int, delay: float, error: BaseException
+    ) -> None:
+        runtime_metrics.increment(f"llm.{operation}.retries")
+        logger.info(
+            f"Retrying {operation} on {self.name} in {delay:.2f}s "
+            f"(attempt {attempt}/{settings.llm_max_retries}): {error}"
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.pipeline_workers, thread_name_prefix="hedge"
+            )
+        return self._executor
+
+
+_endpoints: Dict[str, ResilientEndpoint] = {}
+_lock = threading.Lock()
+
+
+def get_endpoint(base_url: Optional[str] = None) -> ResilientEndpoint:
+    """Process-wide resilience state for the endpoint behind base_url."""
+    base_url = base_url or settings.api_base_url or "https://api.openai.com/v1"
+    name = httpx.URL(base_url).host or "default"
+    with _lock:
+        endpoint = _endpoints.get(name)
+        if endpoint is None:
+            endpoint = _endpoints[name] = ResilientEndpoint(name)
+        return endpoint
+
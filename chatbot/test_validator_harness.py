@@ -496,6 +496,12 @@ class ValidatorTestHarness:
             },
         }
 
+        guards = self.validators.get("security_guards")
+        if guards is not None and guards.input_cascade is not None:
+            report["cascade"] = guards.cascade_stats()
+        if guards is not None and guards.batchers:
+            report["batching"] = guards.batching_stats()
+
         return report
 
     def _generate_performance_report(self) -> Dict[str, Any]:
@@ -528,7 +534,7 @@ class ValidatorTestHarness:
                 ),  # tests per second
             }
 
-        return {
+        report = {
             "performance_summary": performance_data,
             "concurrent_capability": {
                 "max_workers": self.config["concurrent_tests"],
@@ -541,6 +547,12 @@ class ValidatorTestHarness:
             },
         }
 
+        guards = self.validators.get("security_guards")
+        if guards is not None and guards.batchers:
+            report["batching"] = guards.batching_stats()
+
+        return report
+
     def _summarize_by_validator(self, by_validator: Dict) -> Dict:
         """Summarize results by validator."""
         summary = {}
@@ -643,6 +655,23 @@ class ValidatorTestHarness:
             print(f"     Tests: {metrics['total_tests']}")
             print(f"     Accuracy: {metrics['accuracy']:.1f}%")
 
+        if report.get("cascade"):
+            print("\n🪜 CASCADE STAGES:")
+            for stage, metrics in report["cascade"].items():
+                print(f"   {stage}:")
+                print(f"     Runs: {metrics['runs']}")
+                print(
+                    f"     Latency: mean {metrics['mean_latency'] * 1000:.2f}ms, "
+                    f"p95 {metrics['p95_latency'] * 1000:.2f}ms"
+                )
+                print(
+                    f"     Short-circuits: {metrics['short_circuit_fail']} failed, "
+                    f"{metrics['short_circuit_pass']} passed, "
+                    f"{metrics['inconclusive']} passed on"
+                )
+
+        self._print_batching(report)
+
         findings = report["security_findings"]
         if findings["critical_bypasses"]:
             print("\n🚨 CRITICAL SECURITY BYPASSES:")
@@ -656,6 +685,56 @@ class ValidatorTestHarness:
 
         print("\n" + "=" * 80)
 
+    def print_performance_report(self, report: Dict[str, Any]) -> None:
+        """Print the concurrent performance report to console."""
+        if "error" in report:
+            print(f"❌ Error: {report['error']}")
+            return
+
+        print("\n" + "=" * 80)
+        print("⚡ VALIDATOR TEST HARNESS - CONCURRENT PERFORMANCE REPORT")
+        print("=" * 80)
+
+        for validator, metrics in report["performance_summary"].items():
+            print(f"   {validator}:")
+            print(
+                f"     Tests: {metrics['total_tests']} "
+                f"({metrics['timeouts']} timeouts, {metrics['errors']} errors)"
+            )
+            print(
+                f"     Time: avg {metrics['average_time']:.3f}s, "
+                f"max {metrics['max_time']:.3f}s"
+            )
+            print(f"     Throughput: {metrics['throughput']:.2f} tests/s")
+
+        capability = report["concurrent_capability"]
+        print(
+            f"\n   Workers: {capability['max_workers']}, "
+            f"success rate {capability['overall_success_rate']:.1f}%"
+        )
+
+        self._print_batching(report)
+
+        print("\n" + "=" * 80)
+
+    def _print_batching(self, report: Dict[str, Any]) -> None:
+        if not report.get("batching"):
+            return
+
+        print("\n📦 LOCAL MODEL BATCHING:")
+        for name, metrics in report["batching"].items():
+            print(f"   {name}:")
+            print(
+                f"     Batches: {metrics['batches']} for {metrics['items']} inputs "
+                f"(mean size {metrics['mean_batch_size']:.1f}, "
+                f"max {metrics['max_batch_size']})"
+            )
+            print(f"     Throughput: {metrics['throughput']:.1f} inputs/s")
+            print(
+                f"     Queueing: mean depth {metrics['mean_queue_depth']:.1f}, "
+                f"p95 wait {metrics['p95_wait'] * 1000:.2f}ms"
+            )
+
     def save_report(self, report: Dict[str, Any], filename: str) -> None:
         """Save report to file."""
         output_path = Path(filename)
@@ -704,7 +783,10 @@ def main():
 
         # Display results
         if not args.quiet:
-            harness.print_detailed_report(report)
+            if args.concurrent:
+                harness.print_performance_report(report)
+            else:
+                harness.print_detailed_report(report)
 
         # Save results if requested
         if args.output:
@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+from typing import List
+
+from src.utils.batching import MicroBatcher
+
+
+class MicroBatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.batches: List[List[int]] = []
+
+    def create(self, max_batch_size: int, max_wait: float, process=None) -> MicroBatcher:
+        def double(items: List[int]) -> List[int]:
+            self.batches.append(list(items))
+            return [item * 2 for item in items]
+
+        return MicroBatcher("test", process or double, max_batch_size, max_wait)
+
+    def test_concurrent_items_are_coalesced(self):
+        batcher = self.create(max_batch_size=10, max_wait=0.2)
+        futures = [batcher.submit(i) for i in range(5)]
+        self.assertEqual([f.result(timeout=5) for f in futures], [0, 2, 4, 6, 8])
+        self.assertEqual(self.batches, [[0, 1, 2, 3, 4]])
+
+    def test_batches_are_capped_at_the_maximum_size(self):
+        batcher = self.create(max_batch_size=2, max_wait=0.2)
+        futures = [batcher.submit(i) for i in range(5)]
+        self.assertEqual([f.result(timeout=5) for f in futures], [0, 2, 4, 6, 8])
+        self.assertEqual(self.batches, [[0, 1], [2, 3], [4]])
+
+    def test_lone_item_is_processed_after_the_wait(self):
+        batcher = self.create(max_batch_size=10, max_wait=0.05)
+        start = time.perf_counter()
+        self.assertEqual(batcher(21), 42)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(self.batches, [[21]])
+
+    def test_error_reaches_every_caller_of_the_batch(self):
+        def fail(items):
+            raise ValueError("model failed")
+
+        batcher = self.create(max_batch_size=10, max_wait=0.2, process=fail)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            with self.assertRaisesRegex(ValueError, "model failed"):
+                future.result(timeout=5)
+
+    def test_cancelled_items_are_not_processed(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def blocked(items):
+            release.wait(5)
+            self.batches.append(list(items))
+            return items
+
+        batcher = self.create(max_batch_size=1, max_wait=0, process=blocked)
+        first = batcher.submit(1)
+        cancelled = batcher.submit(2)
+        self.assertTrue(cancelled.cancel())
+        kept = batcher.submit(3)
+        release.set()
+
+        self.assertEqual(first.result(timeout=5), 1)
+        self.assertEqual(kept.result(timeout=5), 3)
+        self.assertEqual(self.batches, [[1], [3]])
+
+
+if __name__ == "__main__":
+    unittest.main()
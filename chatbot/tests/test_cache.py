@@ -0,0 +1,53 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from src.utils.cache import DebouncedSaver, PersistentLRUCache
+
+
+class DebouncedSaverTest(unittest.TestCase):
+    def test_burst_of_requests_saves_once(self):
+        saves = []
+        saver = DebouncedSaver(lambda: saves.append(time.time()), delay=0.05)
+        for _ in range(100):
+            saver.request()
+        self.assertEqual(saves, [])
+        time.sleep(0.2)
+        self.assertEqual(len(saves), 1)
+
+    def test_flush_saves_pending_changes_only(self):
+        saves = []
+        saver = DebouncedSaver(lambda: saves.append(1), delay=60)
+        saver.flush()
+        self.assertEqual(saves, [])
+        saver.request()
+        saver.flush()
+        self.assertEqual(saves, [1])
+
+    def test_zero_delay_saves_synchronously(self):
+        saves = []
+        saver = DebouncedSaver(lambda: saves.append(1), delay=0)
+        saver.request()
+        saver.request()
+        self.assertEqual(saves, [1, 1])
+
+
+class PersistentLRUCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "cache.json"
+
+    def test_set_does_not_write_synchronously(self):
+        cache = PersistentLRUCache("test", str(self.path), save_delay=60)
+        cache.set("key", "value")
+        self.assertFalse(self.path.exists())
+        cache.flush()
+        self.assertEqual(
+            PersistentLRUCache("test", str(self.path)).get("key"), "value"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from src.security.cascade import (
+    FAIL,
+    INCONCLUSIVE,
+    PASS,
+    CascadeStage,
+    DenyListStage,
+    StreamMonitor,
+    ValidatorCascade,
+)
+
+
+class StubStage(CascadeStage):
+    """Returns a fixed verdict, optionally after waiting for an event."""
+
+    def __init__(self, name: str, verdict: str, wait: Optional[threading.Event] = None):
+        super().__init__(name)
+        self.verdict = verdict
+        self.wait = wait
+        self.started = threading.Event()
+
+    def check(self, text: str) -> Tuple[str, str]:
+        self.started.set()
+        if self.wait is not None:
+            self.wait.wait(5)
+        return self.verdict, self.name
+
+
+class ValidatorCascadeTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        self.executor = executor
+
+    def test_first_decisive_stage_ends_the_cascade(self):
+        later = StubStage("later", FAIL)
+        cascade = ValidatorCascade(
+            [StubStage("length", INCONCLUSIVE), StubStage("model", PASS), later]
+        )
+        result = cascade.validate("text")
+        self.assertTrue(result.passed)
+        self.assertEqual(result.stage, "model")
+        self.assertFalse(later.started.is_set())
+
+    def test_first_failure_in_a_group_cancels_the_rest(self):
+        slow = StubStage("slow", PASS, wait=self.release)
+        failing = StubStage("failing", FAIL)
+        queued = StubStage("queued", PASS)
+        cascade = ValidatorCascade([[slow, failing, queued]], executor=self.executor)
+
+        start = time.perf_counter()
+        result = cascade.validate("text")
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertFalse(result.passed)
+        self.assertEqual(result.stage, "failing")
+        self.assertTrue(slow.started.is_set())
+
+        self.release.set()
+        self.executor.shutdown(wait=True)
+        self.assertFalse(queued.started.is_set())
+
+    def test_group_passes_once_every_stage_has_passed(self):
+        slow = StubStage("slow", PASS, wait=self.release)
+        fast = StubStage("fast", PASS)
+        after = StubStage("after", FAIL)
+        cascade = ValidatorCascade([[slow, fast], after], executor=self.executor)
+
+        threading.Timer(0.05, self.release.set).start()
+        result = cascade.validate("text")
+        self.assertEqual(result.stage, "after")
+        self.assertIn("slow", result.timings)
+
+    def test_raising_stage_fails_the_input(self):
+        class Broken(CascadeStage):
+            def check(self, text):
+                raise RuntimeError("boom")
+
+        result = ValidatorCascade([Broken("broken")]).validate("text")
+        self.assertFalse(result.passed)
+        self.assertIn("boom", result.reason)
+
+
+class StreamMonitorTest(unittest.TestCase):
+    def setUp(self):
+        self.monitor = StreamMonitor(
+            [DenyListStage("deny", [{"name": "place", "keywords": ["Kouvosto"]}])]
+        )
+
+    def test_failure_is_reported_on_the_chunk_that_trips_it(self):
+        self.assertIsNone(self.monitor.feed("Nothing to "))
+        self.assertIsNone(self.monitor.feed("see here. "))
+        result = self.monitor.feed("Kouvosto is")
+        self.assertFalse(result.passed)
+        self.assertEqual(result.stage, "deny")
+        self.assertIs(self.monitor.feed(" more"), result)
+
+    def test_match_split_across_chunks_is_found(self):
+        self.assertIsNone(self.monitor.feed("We went to Kouv"))
+        self.assertIsNotNone(self.monitor.feed("osto today"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import logging
+import os
+import signal
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+from config.settings import settings
+from src.security.guards import SecurityGuards
+
+CONFIG = {
+    "guards": [],
+    "input_validation": {"max_length": 2000, "min_length": 1},
+    "output_validation": {"max_length": 4000},
+    "cascade": {"enabled": True, "parallel": False, "deny_lists": []},
+}
+
+
+class GuardReloadTest(unittest.TestCase):
+    """Hot reload of the guard config, with the local models turned off."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config_path = Path(directory.name) / "guardrails.yaml"
+        self.write(CONFIG)
+
+        patchers = [
+            mock.patch.multiple(
+                settings,
+                guardrails_config=str(self.config_path),
+                guardrails_hot_reload=False,
+            ),
+            mock.patch.object(SecurityGuards, "_setup_guardrails", return_value=False),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.guards = SecurityGuards(logging.getLogger(__name__))
+
+    def write(self, config, max_output: int = None) -> None:
+        if max_output is not None:
+            config = {**config, "output_validation": {"max_length": max_output}}
+        text = config if isinstance(config, str) else yaml.safe_dump(config)
+        self.config_path.write_text(text)
+
+    def max_output(self) -> int:
+        return self.guards.config["output_validation"]["max_length"]
+
+    def test_change_is_applied_once_the_file_is_stable(self):
+        seen = self.guards._poll_config(self.guards.config_stamp)
+        self.write(CONFIG, max_output=10)
+
+        seen = self.guards._poll_config(seen)
+        self.assertEqual(self.max_output(), 4000)
+        self.guards._poll_config(seen)
+        self.assertEqual(self.max_output(), 10)
+        self.assertIsNone(self.guards.validate_output("x" * 20))
+
+    def test_file_still_being_written_is_not_applied(self):
+        seen = self.guards.config_stamp
+        for length in (10, 11, 12):
+            self.write(CONFIG, max_output=length)
+            seen = self.guards._poll_config(seen)
+            self.assertEqual(self.max_output(), 4000)
+
+    def test_partial_file_keeps_current_guards(self):
+        guard_set = self.guards.guard_set
+        self.write("guards:\n  - name: [\n")
+        self.assertFalse(self.guards.reload())
+        self.write("guards: {name: detect_jailbreak}\n")
+        self.assertFalse(self.guards.reload())
+        self.assertIs(self.guards.guard_set, guard_set)
+
+    def test_sections_and_guards_can_be_removed(self):
+        self.write({"guards": [], "output_validation": {"max_length": 10}})
+        self.assertTrue(self.guards.reload())
+        self.assertNotIn("cascade", self.guards.config)
+        self.assertEqual(self.max_output(), 10)
+
+    @unittest.skipUnless(hasattr(signal, "SIGHUP"), "needs SIGHUP")
+    def test_sighup_reloads_immediately(self):
+        with mock.patch.multiple(settings, guardrails_reload_interval=0):
+            self.guards._start_reloader()
+            self.write(CONFIG, max_output=10)
+            os.kill(os.getpid(), signal.SIGHUP)
+
+            deadline = time.monotonic() + 5
+            while self.max_output() != 10 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(self.max_output(), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
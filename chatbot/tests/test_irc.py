@@ -0,0 +1,60 @@
+import unittest
+
+try:
+    from src.utils.irc import MAX_LINE_LENGTH, split_complete
+except ImportError as e:  # the irc package is not installed
+    raise unittest.SkipTest(str(e))
+
+
+def stream(deltas):
+    """Feed deltas through split_complete like IrcBot._stream_response."""
+    lines, buffer = [], ""
+    for delta in deltas:
+        complete, buffer = split_complete(buffer + delta)
+        lines.extend(complete)
+    return lines, buffer
+
+
+class SplitCompleteTest(unittest.TestCase):
+    def test_complete_sentences_are_flushed_and_the_tail_kept(self):
+        self.assertEqual(
+            split_complete("Hello there. How are"), (["Hello there."], " How are")
+        )
+        self.assertEqual(split_complete("a\n\nb"), (["a"], "b"))
+
+    def test_sentence_end_waits_for_the_next_delta(self):
+        self.assertEqual(split_complete("Done."), ([], "Done."))
+        self.assertEqual(split_complete("Version 2.5 is"), ([], "Version 2.5 is"))
+
+    def test_partial_tail_is_carried_over(self):
+        lines, tail = stream(["Hel", "lo the", "re. How", " are you?", "\nFi", "ne"])
+        self.assertEqual(lines, ["Hello there.", " How are you?"])
+        self.assertEqual(tail, "Fine")
+
+    def test_long_text_is_cut_at_the_last_space(self):
+        text = "word " * 100
+        lines, tail = split_complete(text)
+        self.assertEqual(len(lines), 1)
+        self.assertLessEqual(len(lines[0]), MAX_LINE_LENGTH)
+        self.assertFalse(lines[0].endswith("wor"))
+        self.assertEqual(lines[0] + tail, text)
+
+    def test_long_word_is_cut_at_the_limit(self):
+        limit = MAX_LINE_LENGTH
+        word = "x" * (limit * 2 + 10)
+        lines, tail = stream([word[:300], word[300:]])
+        self.assertEqual(lines, [word[:limit], word[limit : 2 * limit]])
+        self.assertEqual(tail, word[2 * limit :])
+
+    def test_multi_byte_text_keeps_whole_characters(self):
+        text = "äö😀" * 200
+        lines, tail = split_complete(text)
+        self.assertEqual(lines, [text[:MAX_LINE_LENGTH]])
+        self.assertEqual(lines[0] + tail, text)
+        self.assertEqual(
+            split_complete("Hyvää päivää. Kiitos"), (["Hyvää päivää."], " Kiitos")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.security.cascade import DenyListStage, StreamMonitor
+
+try:
+    from src.pipeline.nodes import REFUSAL_RESPONSE, ChatbotPipeline
+except ImportError as e:  # sentence-transformers is not installed
+    raise unittest.SkipTest(str(e))
+
+
+class StubLLMClient:
+    """Streams fixed deltas and records how far the stream got."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.produced = 0
+        self.closed = False
+
+    async def astream_response(self, messages, user_input):
+        try:
+            for delta in self.deltas:
+                self.produced += 1
+                yield delta
+        finally:
+            self.closed = True
+
+
+class StreamGenerationTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = ChatbotPipeline.__new__(ChatbotPipeline)
+        stages = [DenyListStage("deny", [{"name": "place", "keywords": ["Kouvosto"]}])]
+        self.pipeline.security_guards = mock.Mock()
+        self.pipeline.security_guards.create_output_monitor.side_effect = (
+            lambda: StreamMonitor(stages)
+        )
+        self.pipeline.build_messages = lambda state: []
+
+    def stream(self, deltas):
+        self.pipeline.llm_client = StubLLMClient(deltas)
+        state = {"validated_input": "hi"}
+
+        async def collect():
+            return [d async for d in self.pipeline.astream_generation_node(state)]
+
+        return asyncio.run(collect()), state
+
+    def test_stream_is_cut_off_when_a_stage_fails(self):
+        output, state = self.stream(["Hello ", "there. ", "Kouvosto ", "is ", "near."])
+
+        self.assertEqual(output, ["Hello ", "there. ", "\n" + REFUSAL_RESPONSE])
+        self.assertEqual(self.pipeline.llm_client.produced, 3)
+        self.assertTrue(self.pipeline.llm_client.closed)
+        self.assertEqual(state["response"], REFUSAL_RESPONSE)
+        self.pipeline.security_guards.log_output_failure.assert_called_once()
+
+    def test_refusal_alone_when_the_first_delta_fails(self):
+        output, _ = self.stream(["Kouvosto ", "is ", "near."])
+        self.assertEqual(output, [REFUSAL_RESPONSE])
+        self.assertEqual(self.pipeline.llm_client.produced, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
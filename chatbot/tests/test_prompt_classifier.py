@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from config.settings import settings
+
+try:
+    from src.security.prompt_classifier import (
+        NORMAL,
+        UNUSUAL,
+        PromptClassifier,
+        _unit,
+        calibrate_temperature,
+        evaluate_margins,
+        leave_one_out_margins,
+    )
+except ImportError as e:  # sentence-transformers is not installed
+    raise unittest.SkipTest(str(e))
+
+
+class LeaveOneOutTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.embeddings = {
+            NORMAL: _unit(rng.normal(size=(5, 8))),
+            UNUSUAL: _unit(rng.normal(size=(6, 8))),
+        }
+
+    def test_margins_use_centroids_trained_without_the_example(self):
+        margins = leave_one_out_margins(self.embeddings)
+        for label, rows in self.embeddings.items():
+            other = NORMAL if label == UNUSUAL else UNUSUAL
+            other_centroid = _unit(self.embeddings[other].mean(axis=0))
+            for i, row in enumerate(rows):
+                own_centroid = _unit(np.delete(rows, i, axis=0).mean(axis=0))
+                expected = row @ own_centroid - row @ other_centroid
+                if label == NORMAL:
+                    expected = -expected
+                self.assertAlmostEqual(margins[label][i], expected, places=5)
+
+    def test_evaluation_counts_held_out_errors(self):
+        margins = {
+            NORMAL: np.array([-0.2, -0.1, 0.05]),
+            UNUSUAL: np.array([0.3, -0.05]),
+        }
+        temperature = calibrate_temperature(margins)
+        evaluation = evaluate_margins(margins, temperature)
+        self.assertAlmostEqual(evaluation["accuracy"], 3 / 5)
+        self.assertGreater(evaluation["max_normal_score"], 0.5)
+        self.assertLess(evaluation["min_unusual_score"], 0.5)
+
+
+class PassBelowTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.classifier = PromptClassifier(
+            {NORMAL: rng.normal(size=8), UNUSUAL: rng.normal(size=8)},
+            temperature=0.05,
+            model_id="test",
+            version="test",
+            evaluation={"min_unusual_score": 0.3},
+        )
+
+    def test_defaults_to_the_lowest_held_out_unusual_score(self):
+        with mock.patch.multiple(settings, prompt_classifier_pass_below=""):
+            self.assertEqual(self.classifier.pass_below, 0.3)
+
+    def test_setting_overrides_the_calibrated_cutoff(self):
+        with mock.patch.multiple(settings, prompt_classifier_pass_below="0"):
+            self.assertEqual(self.classifier.pass_below, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from config.settings import settings
+from src.utils.metrics import runtime_metrics
+from src.utils.resilience import ResilientEndpoint
+
+
+class HedgedCallTest(unittest.TestCase):
+    """Calls that finish before the hedge delay must not be hedged."""
+
+    OPERATION = "test_hedge"
+
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            settings,
+            llm_hedge_enabled=True,
+            llm_hedge_min_samples=1,
+            llm_hedge_min_delay=0.5,
+            llm_max_retries=0,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        runtime_metrics.observe(f"llm.{self.OPERATION}.latency", 0.5)
+        self.endpoint = ResilientEndpoint("test")
+
+    def test_async_success_before_hedge_delay(self):
+        async def call():
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        result = asyncio.run(self.endpoint.acall(self.OPERATION, call))
+        self.assertEqual(result, "ok")
+
+    def test_async_error_before_hedge_delay(self):
+        async def call():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.endpoint.acall(self.OPERATION, call))
+
+    def test_sync_success_before_hedge_delay(self):
+        self.assertEqual(self.endpoint.call(self.OPERATION, lambda: "ok"), "ok")
+
+    def test_sync_error_before_hedge_delay(self):
+        def call():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.endpoint.call(self.OPERATION, call)
+
+
+if __name__ == "__main__":
+    unittest.main()
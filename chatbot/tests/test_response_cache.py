@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.rag.response_cache import SemanticResponseCache
+
+
+class SemanticResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.embeddings = np.random.default_rng(0).normal(size=(10, 16))
+
+    def create(self, max_entries: int = 3) -> SemanticResponseCache:
+        return SemanticResponseCache(
+            self.path, threshold=0.99, max_entries=max_entries, ttl=0, save_delay=60
+        )
+
+    def store(self, cache: SemanticResponseCache, i: int) -> None:
+        cache.store(f"q{i}", self.embeddings[i], f"r{i}", "v1")
+
+    def test_hit_protects_entry_from_eviction(self):
+        cache = self.create()
+        for i in range(3):
+            self.store(cache, i)
+        self.assertEqual(cache.lookup(self.embeddings[0], "v1"), "r0")
+        self.store(cache, 3)
+        self.assertEqual(cache.lookup(self.embeddings[0], "v1"), "r0")
+        self.assertIsNone(cache.lookup(self.embeddings[1], "v1"))
+        self.assertEqual(cache.lookup(self.embeddings[3], "v1"), "r3")
+
+    def test_lru_order_survives_restart(self):
+        cache = self.create()
+        for i in range(3):
+            self.store(cache, i)
+        cache.lookup(self.embeddings[0], "v1")
+        cache.flush()
+
+        restored = self.create()
+        self.store(restored, 3)
+        self.assertEqual(restored.lookup(self.embeddings[0], "v1"), "r0")
+        self.assertIsNone(restored.lookup(self.embeddings[1], "v1"))
+
+    def test_other_knowledge_base_version_is_dropped(self):
+        cache = self.create()
+        self.store(cache, 0)
+        self.assertIsNone(cache.lookup(self.embeddings[0], "v2"))
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
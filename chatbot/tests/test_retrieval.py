@@ -0,0 +1,157 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+from config.settings import settings
+from src.rag.documents import MarkdownDocumentProcessor
+from src.utils.cache import LRUCache
+
+try:
+    from src.rag.retrieval import RAGRetriever
+except ImportError as e:  # sentence-transformers is not installed
+    raise unittest.SkipTest(str(e))
+
+
+class StubEmbeddingService:
+    """Keeps chunk metadata in a dict and records what the sync did."""
+
+    def __init__(self):
+        self.chunks: Dict[str, Dict[str, Any]] = {}
+        self.embedded: List[str] = []
+        self.refreshed: List[str] = []
+        self.deleted: List[str] = []
+
+    def get_indexed_sources(self) -> Dict[str, Dict[str, Any]]:
+        sources: Dict[str, Dict[str, Any]] = {}
+        for chunk_id, metadata in self.chunks.items():
+            entry = sources.setdefault(
+                metadata["source"], {"ids": [], "source_hashes": set()}
+            )
+            entry["ids"].append(chunk_id)
+            entry["source_hashes"].add(metadata["source_hash"])
+        return sources
+
+    def embed_documents(self, documents) -> None:
+        for document in documents:
+            self.chunks[document.metadata["chunk_id"]] = dict(document.metadata)
+            self.embedded.append(document.metadata["chunk_id"])
+
+    def update_metadata(self, documents) -> None:
+        for document in documents:
+            self.chunks[document.metadata["chunk_id"]] = dict(document.metadata)
+            self.refreshed.append(document.metadata["chunk_id"])
+
+    def delete_documents(self, ids) -> None:
+        for chunk_id in ids:
+            del self.chunks[chunk_id]
+            self.deleted.append(chunk_id)
+
+    def sources(self) -> set:
+        return {Path(m["source"]).name for m in self.chunks.values()}
+
+
+class SyncKnowledgeBaseTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.documents = Path(directory.name)
+        patcher = mock.patch.multiple(
+            settings,
+            documents_path=str(self.documents),
+            ingest_workers=1,
+            chunk_size=200,
+            chunk_overlap=0,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.service = StubEmbeddingService()
+        self.retriever = RAGRetriever.__new__(RAGRetriever)
+        self.retriever.logger = logging.getLogger(__name__)
+        self.retriever.embedding_service = self.service
+        self.retriever.document_processor = MarkdownDocumentProcessor()
+        self.retriever.context_cache = LRUCache("test_retrieval_context")
+
+    def write(self, name: str, text: str) -> None:
+        (self.documents / name).write_text(text, encoding="utf-8")
+
+    def sync(self) -> None:
+        self.service.embedded.clear()
+        self.service.refreshed.clear()
+        self.service.deleted.clear()
+        self.retriever.sync_knowledge_base()
+
+    def test_new_files_are_embedded(self):
+        self.write("a.md", "# A\n\nAlpha.")
+        self.sync()
+        self.assertEqual(self.service.sources(), {"a.md"})
+        first = set(self.service.embedded)
+        self.assertTrue(first)
+
+        self.write("b.md", "# B\n\nBravo.")
+        self.sync()
+        self.assertEqual(self.service.sources(), {"a.md", "b.md"})
+        self.assertTrue(self.service.embedded)
+        self.assertFalse(first & set(self.service.embedded))
+        self.assertEqual(self.service.deleted, [])
+
+    def test_unchanged_files_are_skipped(self):
+        self.write("a.md", "# A\n\nAlpha.")
+        self.sync()
+        chunks = dict(self.service.chunks)
+
+        self.sync()
+        self.assertEqual(self.service.embedded, [])
+        self.assertEqual(self.service.refreshed, [])
+        self.assertEqual(self.service.deleted, [])
+        self.assertEqual(self.service.chunks, chunks)
+
+    def test_changed_file_embeds_only_changed_chunks(self):
+        first = "First section. " * 10
+        self.write("a.md", f"# One\n\n{first}\n\n# Two\n\n{'Second section. ' * 10}")
+        self.sync()
+        before = set(self.service.chunks)
+        self.assertGreater(len(before), 1)
+
+        self.write("a.md", f"# One\n\n{first}\n\n# Two\n\n{'Edited section. ' * 10}")
+        self.sync()
+        after = set(self.service.chunks)
+        self.assertEqual(set(self.service.embedded), after - before)
+        self.assertEqual(set(self.service.deleted), before - after)
+        self.assertEqual(set(self.service.refreshed), before & after)
+        self.assertTrue(before & after)
+        self.assertEqual(len(self.service.embedded), 1)
+
+    def test_removed_file_drops_its_chunks(self):
+        self.write("a.md", "# A\n\nAlpha.")
+        self.write("b.md", "# B\n\nBravo.")
+        self.sync()
+        b_chunks = {
+            chunk_id
+            for chunk_id, metadata in self.service.chunks.items()
+            if Path(metadata["source"]).name == "b.md"
+        }
+
+        (self.documents / "b.md").unlink()
+        self.sync()
+        self.assertEqual(set(self.service.deleted), b_chunks)
+        self.assertEqual(self.service.embedded, [])
+        self.assertEqual(self.service.sources(), {"a.md"})
+
+    def test_unreadable_file_keeps_its_chunks(self):
+        self.write("a.md", "# A\n\nAlpha.")
+        self.write("b.md", "# B\n\nBravo.")
+        self.sync()
+
+        (self.documents / "b.md").write_bytes(b"\xff\xfe not utf-8")
+        self.sync()
+
+        self.assertEqual(self.service.deleted, [])
+        self.assertEqual(self.service.sources(), {"a.md", "b.md"})
+
+
+if __name__ == "__main__":
+    unittest.main()
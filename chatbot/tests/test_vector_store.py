@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.rag.vector_store import NumpyVectorStore
+
+
+class NumpyVectorStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.embeddings = np.random.default_rng(0).normal(size=(20, 16))
+        self.ids = [f"c{i}" for i in range(20)]
+
+    def fill(self, store: NumpyVectorStore) -> None:
+        store.upsert(
+            self.ids,
+            self.embeddings,
+            [f"text {i}" for i in range(20)],
+            [{"i": i} for i in range(20)],
+        )
+
+    def test_every_dtype_finds_the_exact_match(self):
+        for dtype in NumpyVectorStore.DTYPES:
+            with self.subTest(dtype=dtype):
+                store = NumpyVectorStore(f"{self.path}/{dtype}", dtype=dtype)
+                self.fill(store)
+                results = store.query(self.embeddings[7], k=3)
+                self.assertEqual(results[0]["content"], "text 7")
+                self.assertAlmostEqual(results[0]["distance"], 0.0, places=2)
+
+                reopened = NumpyVectorStore(f"{self.path}/{dtype}", dtype=dtype)
+                self.assertEqual(reopened.count(), 20)
+
+    def test_delete_and_compact_keep_live_rows(self):
+        store = NumpyVectorStore(self.path, dtype="int8")
+        self.fill(store)
+        store.delete(self.ids[:10])
+        store.compact()
+        self.assertEqual(store.count(), 10)
+        self.assertEqual(store.query(self.embeddings[15], k=1)[0]["content"], "text 15")
+        remaining = [r["metadata"]["i"] for r in store.query(self.embeddings[3], k=20)]
+        self.assertEqual(sorted(remaining), list(range(10, 20)))
+
+    def test_writes_are_logged_and_replayed_by_other_instances(self):
+        store = NumpyVectorStore(self.path)
+        reader = NumpyVectorStore(self.path)
+        self.fill(store)
+        index_size = store.index_path.stat().st_size
+        store.update_metadata(["c3"], [{"i": "updated"}])
+        store.delete(["c4"])
+        store.upsert(["c5"], self.embeddings[10:11], ["moved"], [{"i": 5}])
+
+        self.assertEqual(store.index_path.stat().st_size, index_size)
+        self.assertEqual(reader.count(), 19)
+        self.assertEqual(reader.query(self.embeddings[3], k=1)[0]["metadata"], {"i": "updated"})
+        self.assertEqual(
+            {r["content"] for r in reader.query(self.embeddings[10], k=2)},
+            {"text 10", "moved"},
+        )
+
+    def test_torn_log_tail_is_ignored_and_overwritten(self):
+        store = NumpyVectorStore(self.path)
+        self.fill(store)
+        with open(store.log_path, "ab") as f:
+            f.write(b'{"op": "add", "id": "torn", "docu')
+
+        reopened = NumpyVectorStore(self.path)
+        self.assertEqual(reopened.count(), 20)
+        reopened.upsert(["new"], self.embeddings[:1], ["new text"], [{}])
+        self.assertEqual(NumpyVectorStore(self.path).count(), 21)
+
+    def test_dtype_switch_opens_and_can_be_rebuilt(self):
+        self.fill(NumpyVectorStore(self.path, dtype="float32"))
+
+        store = NumpyVectorStore(self.path, dtype="int8")
+        with self.assertRaisesRegex(ValueError, "rebuild the knowledge base"):
+            store.query(self.embeddings[0], k=1)
+        with self.assertRaisesRegex(ValueError, "rebuild the knowledge base"):
+            self.fill(store)
+
+        store.clear()
+        self.fill(store)
+        self.assertEqual(store.query(self.embeddings[4], k=1)[0]["content"], "text 4")
+        self.assertEqual(
+            sorted(p.name for p in store.path.glob("vectors-*")),
+            [store.vectors_path.name],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()